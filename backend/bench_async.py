@@ -0,0 +1,142 @@
+"""Compare the sync (threadpool) and async (DB_ASYNC=1) database modes under load.
+
+Each mode runs in its own process against a fresh SQLite file. N concurrent
+clients fetch workflow details through the ASGI app in-process while a probe
+hits the DB-free /test endpoint, showing whether unrelated requests stall.
+--latency-ms adds a per-statement delay inside the driver thread to stand in
+for a networked database.
+
+    python bench_async.py --clients 500 --requests 2 --latency-ms 100
+"""
+from datetime import date
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0.0
+
+def add_latency(engine, latency_ms):
+    from sqlalchemy import event
+
+    def on_connect(dbapi_connection, connection_record):
+        # aiosqlite wraps the sqlite3 connection that runs in its worker thread
+        driver = getattr(dbapi_connection, "driver_connection", dbapi_connection)
+        raw = getattr(driver, "_conn", driver)
+        raw.set_trace_callback(lambda statement: time.sleep(latency_ms / 1000))
+
+    event.listen(engine, "connect", on_connect)
+
+def seed(count):
+    from db import crud, database, models, schemas
+    models.Base.metadata.create_all(bind=database.engine)
+    payload = dict(
+        biller_integration_name="Bench Biller", category="Bench", integration_type="Online Biller",
+        company_name="Bench Co", phone_number="000", email="bench@example.com", fees_type="Debit",
+        fees_style="Flat", mdr_fee=1.0, fee_waive=False, fee_waive_end_date=date(2030, 1, 1),
+        agent_toggle=False, agent_fee=0.0, system_fee=0.0, transaction_agent_fee=0.0, dtr_fee=0.0,
+        business_owner="Bench", requested_go_live_date=date(2030, 1, 1), setup_fee=0.0,
+        setup_fee_waive=False, setup_fee_waive_end_date=date(2030, 1, 1), maintenance_fee=0.0,
+        maintenance_fee_waive=False, maintenance_fee_waive_end_date=date(2030, 1, 1), portal_fee=0.0,
+        portal_fee_waive=False, portal_fee_waive_end_date=date(2030, 1, 1), requested_by="bench",
+        remarks="", last_updated_by="bench", go_live_date=date(2030, 1, 1),
+    )
+    db = database.SessionLocal()
+    crud.create_workflows_bulk(db, [schemas.WorkflowCreate(**payload)] * count)
+    db.close()
+
+async def run_load(args):
+    import httpx
+    import main
+    from db import database
+
+    seed(args.workflows)
+    if args.latency_ms:
+        add_latency(database.async_engine.sync_engine if database.DB_ASYNC else database.engine, args.latency_ms)
+
+    latencies, probes, errors = [], [], 0
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def user():
+            nonlocal errors
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                response = await client.get(f"/workflows/{random.randint(1, args.workflows)}")
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/test")
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.02)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(args.clients)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "mode": "async" if database.DB_ASYNC else "sync",
+        "clients": args.clients,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "probe_p50_ms": round(percentile(probes, 50) * 1000, 1),
+        "probe_max_ms": round(max(probes, default=0) * 1000, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2, help="requests per client")
+    parser.add_argument("--workflows", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--pool-size", type=int, default=200)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_load(args))))
+        return
+
+    results = []
+    for mode in ("0", "1"):
+        env = dict(
+            os.environ,
+            DB_ASYNC=mode,
+            DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}",
+            DB_POOL_SIZE=str(args.pool_size),
+            DB_MAX_OVERFLOW="0",
+        )
+        output = subprocess.run(
+            [sys.executable, __file__, "--child"] + sys.argv[1:],
+            env=env, check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    columns = list(results[0])
+    print("  ".join(f"{c:>14}" for c in columns))
+    for result in results:
+        print("  ".join(f"{str(result[c]):>14}" for c in columns))
+    sync, async_ = results
+    print(f"async/sync throughput: {async_['throughput_rps'] / sync['throughput_rps']:.2f}x, "
+          f"worst /test stall {sync['probe_max_ms']} ms -> {async_['probe_max_ms']} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Serialization time of the workflow list and detail bodies, per 10k rows.
+
+Seeds --rows workflows (8 steps each) into a fresh SQLite file (unless
+DATABASE_URL is set), loads them once, then times only the encoding:
+- pydantic: validate + model_dump_json, the previous response_model path
+- fast: serializers.py row tuples -> dicts -> orjson
+- fast_json: the same with the json-module fallback used without orjson
+
+    python bench_serialize.py --rows 10000 --repeat 5
+"""
+from collections import defaultdict
+import argparse
+import json
+import os
+import tempfile
+import time
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+    from typing import List
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from bench_async import seed
+    from db import crud, database, models, schemas
+    import serializers
+
+    seed(args.rows)
+    db = database.SessionLocal()
+    # Inputs for both paths, loaded up front so only encoding is timed
+    list_dicts, _ = crud.list_workflows(db, limit=args.rows)
+    list_rows, progress, _ = crud.list_workflow_rows(db, limit=args.rows)
+    orm_workflows = db.query(models.Workflow).options(
+        *(selectinload(getattr(models.Workflow, name)) for name in crud.DETAIL_COLLECTIONS)
+    ).all()
+    detail_rows = db.execute(select(*crud.DETAIL_COLUMNS)).all()
+    # Every collection is loaded, so every detail body carries all three keys
+    collections = defaultdict(lambda: {name: [] for name in crud.DETAIL_COLLECTIONS})
+    for name, columns in crud.DETAIL_COLLECTION_COLUMNS.items():
+        model = columns[0].class_
+        for row in db.execute(select(model.workflow_id, *columns).order_by(model.id)):
+            collections[row[0]][name].append(row[1:])
+
+    adapter = TypeAdapter(List[schemas.WorkflowList])
+    paths = {
+        "list_pydantic": lambda: adapter.dump_json(adapter.validate_python(list_dicts, from_attributes=True)),
+        "list_fast": lambda: serializers.workflow_list_json(list_rows, progress),
+        "detail_pydantic": lambda: [
+            schemas.WorkflowDetail.model_validate(workflow).model_dump_json() for workflow in orm_workflows
+        ],
+        "detail_fast": lambda: [
+            serializers.workflow_detail_json(row, collections[row.id]) for row in detail_rows
+        ],
+    }
+    result = {"rows": len(list_rows), "orjson": serializers.orjson is not None}
+    per_10k = 10000 / max(len(list_rows), 1)
+    for name, fn in paths.items():
+        result[f"{name}_ms_per_10k"] = round(best_of(args.repeat, fn) * 1000 * per_10k, 1)
+    if serializers.orjson is not None:
+        encoder = json.JSONEncoder(default=serializers._default, ensure_ascii=False, separators=(",", ":"))
+        serializers.dumps = lambda value: encoder.encode(value).encode()
+        result["list_fast_json_ms_per_10k"] = round(best_of(args.repeat, paths["list_fast"]) * 1000 * per_10k, 1)
+        result["detail_fast_json_ms_per_10k"] = round(best_of(args.repeat, paths["detail_fast"]) * 1000 * per_10k, 1)
+    db.close()
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
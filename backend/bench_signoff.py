@@ -0,0 +1,88 @@
+"""Latency and conflict behaviour of the single-step signoff write path.
+
+Against a fresh SQLite file (unless DATABASE_URL is set):
+1. latency: approves steps 1-8 of every workflow one call at a time and reports
+   p50/p99 per signoff, plus statements and commits per signoff
+2. conflicts: --racers threads approve the same pending step at once, for
+   --races different steps, and count how many calls succeeded per step
+   (more than 1 means a silent double signoff)
+
+    python bench_signoff.py --workflows 200 --racers 4 --races 100
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workflows", type=int, default=200)
+    parser.add_argument("--racers", type=int, default=4)
+    parser.add_argument("--races", type=int, default=100)
+    args = parser.parse_args()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+    from sqlalchemy import event
+    from bench_async import percentile, seed
+    from db import crud, database, schemas
+
+    seed(args.workflows + args.races)
+    counts = {"statements": 0, "commits": 0}
+    event.listen(database.engine, "before_cursor_execute", lambda *a: counts.__setitem__("statements", counts["statements"] + 1))
+    event.listen(database.engine, "commit", lambda *a: counts.__setitem__("commits", counts["commits"] + 1))
+    approve = schemas.StepSignoff(signoff_person="bench", signoff_status="Approved", remarks=None)
+
+    latencies = []
+    db = database.SessionLocal()
+    for workflow_id in range(1, args.workflows + 1):
+        for step_number in range(1, 9):
+            started = time.perf_counter()
+            crud.signoff_step(db, workflow_id, step_number, approve)
+            latencies.append(time.perf_counter() - started)
+    db.close()
+    signoffs = len(latencies)
+    result = {
+        "signoffs": signoffs,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "statements_per_signoff": round(counts["statements"] / signoffs, 2),
+        "commits_per_signoff": round(counts["commits"] / signoffs, 2),
+    }
+
+    outcomes = {"won": 0, "rejected": 0, "errors": 0, "double_signoffs": 0}
+    lock = threading.Lock()
+    for workflow_id in range(args.workflows + 1, args.workflows + args.races + 1):
+        barrier = threading.Barrier(args.racers)
+        winners = []
+
+        def racer():
+            session = database.SessionLocal()
+            barrier.wait()
+            try:
+                crud.signoff_step(session, workflow_id, 1, approve)
+                outcome = "won"
+            except crud.SignoffConflict:
+                outcome = "rejected"
+            except Exception:
+                outcome = "errors"
+            finally:
+                session.close()
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "won":
+                    winners.append(1)
+
+        threads = [threading.Thread(target=racer) for _ in range(args.racers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if len(winners) > 1:
+            outcomes["double_signoffs"] += 1
+    result.update(outcomes)
+    print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Read/write contention benchmark for the DB_PROFILE engine profiles.
+
+For each profile a fresh SQLite file is seeded, then reader threads page through
+the list and load workflow details while writer threads sign off steps, all for
+a fixed duration. Reports operations per second and "database is locked" errors.
+
+    python bench_sqlite.py --readers 8 --writers 4 --seconds 10
+"""
+from sqlalchemy.exc import OperationalError
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+def run_profile(args):
+    from db import crud, database, schemas
+    from bench_async import seed
+
+    seed(args.workflows)
+    deadline = time.perf_counter() + args.seconds
+    counts = {"reads": 0, "writes": 0, "locked": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def record(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            db = database.SessionLocal()
+            try:
+                crud.list_workflow_rows(db, limit=50)
+                crud.get_workflow_rows(db, random.randint(1, args.workflows))
+                record("reads")
+            except OperationalError as e:
+                record("locked" if "locked" in str(e) else "errors")
+            finally:
+                db.close()
+
+    def writer():
+        while time.perf_counter() < deadline:
+            db = database.SessionLocal()
+            try:
+                signoff = schemas.StepSignoff(
+                    signoff_person="bench", signoff_status=random.choice(["Approved", "Rejected"]), remarks="bench"
+                )
+                crud.signoff_step(db, random.randint(1, args.workflows), random.randint(1, 8), signoff)
+                record("writes")
+            except crud.SignoffConflict:
+                # The step was already signed off; the guarded UPDATE still took the write lock
+                record("writes")
+            except OperationalError as e:
+                db.rollback()
+                record("locked" if "locked" in str(e) else "errors")
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with database.engine.connect() as conn:
+        journal_mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    return {
+        "profile": database.DB_PROFILE,
+        "journal_mode": journal_mode,
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "locked_errors": counts["locked"],
+        "other_errors": counts["errors"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", default="default,production")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--workflows", type=int, default=500)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+
+    results = []
+    for profile in args.profiles.split(","):
+        env = dict(
+            os.environ,
+            DB_PROFILE=profile,
+            DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}",
+        )
+        output = subprocess.run(
+            [sys.executable, __file__, "--child"] + sys.argv[1:],
+            env=env, check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    columns = list(results[0])
+    print("  ".join(f"{c:>13}" for c in columns))
+    for result in results:
+        print("  ".join(f"{str(result[c]):>13}" for c in columns))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Read-through cache for serialized workflow list and detail responses.
+
+Every entry carries tags. A committed change (db.signals) invalidates exactly
+the tags it affects: "workflow:{id}" for that workflow's detail responses, and
+"list" only when the change is visible in, or filterable from, the list
+(creates, signoffs and edits of LIST_FIELDS).
+
+Backends (CACHE_BACKEND):
+- memory: per-process LRU with a TTL (default)
+- sqlite: one SQLite file shared by every worker process on the host, so an
+  invalidation in one worker is seen by all of them
+- none:   caching disabled
+"""
+from anyio import to_thread
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from db import signals
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "./cache.db")
+
+logger = logging.getLogger(__name__)
+
+# Workflow columns shown in, or filterable from, GET /workflows
+LIST_FIELDS = {"title", "status", "current_step", "submit_date", "integration_type", "category", "business_owner"}
+# Tag of GET /workflows?fields=... pages, which may show any column: every change invalidates them
+LIST_PROJECTION_TAG = "list:fields"
+
+class MemoryBackend:
+    blocking = False
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()       # key -> (expires_at, value, tags)
+        self._keys_by_tag = defaultdict(set)
+        self._tag_versions = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._tag_versions[tag] for tag in tags]
+
+    def set(self, key, value, tags, versions):
+        with self._lock:
+            # A tag invalidated since the caller read its versions means the value may be stale
+            if [self._tag_versions[tag] for tag in tags] != versions:
+                return
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._keys_by_tag[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] += 1
+                for key in list(self._keys_by_tag.pop(tag, ())):
+                    self._remove(key)
+
+    def size(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for tag in entry[2]:
+                self._keys_by_tag[tag].discard(key)
+
+class SQLiteBackend:
+    # Shared between processes; evicts the least recently stored entries once full
+    blocking = True   # file I/O and lock waits: keep off the event loop
+    def __init__(self, path, max_entries, ttl):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL);
+                CREATE TABLE IF NOT EXISTS entry_tags (tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key));
+                CREATE TABLE IF NOT EXISTS tag_versions (tag TEXT PRIMARY KEY, version INTEGER NOT NULL);
+            """)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def versions(self, tags):
+        rows = dict(self._connect().execute(
+            f"SELECT tag, version FROM tag_versions WHERE tag IN ({','.join('?' * len(tags))})", tags
+        ).fetchall())
+        return [rows.get(tag, 0) for tag in tags]
+
+    def set(self, key, value, tags, versions):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.versions(tags) != versions:
+                return
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, json.dumps(value), time.time() + self.ttl))
+            conn.executemany("INSERT OR IGNORE INTO entry_tags VALUES (?, ?)", [(tag, key) for tag in tags])
+            evicted = conn.execute(
+                "DELETE FROM entries WHERE expires_at < ? OR rowid <= "
+                "(SELECT max(rowid) FROM entries) - ?", (time.time(), self.max_entries)
+            ).rowcount
+            if evicted:
+                conn.execute("DELETE FROM entry_tags WHERE key NOT IN (SELECT key FROM entries)")
+        finally:
+            conn.execute("COMMIT")
+
+    def invalidate(self, tags):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for tag in tags:
+                conn.execute(
+                    "INSERT INTO tag_versions VALUES (?, 1) ON CONFLICT(tag) DO UPDATE SET version = version + 1", (tag,)
+                )
+                conn.execute("DELETE FROM entries WHERE key IN (SELECT key FROM entry_tags WHERE tag = ?)", (tag,))
+                conn.execute("DELETE FROM entry_tags WHERE tag = ?", (tag,))
+        finally:
+            conn.execute("COMMIT")
+
+    def size(self):
+        return self._connect().execute("SELECT count(*) FROM entries").fetchone()[0]
+
+class NullBackend:
+    blocking = False
+
+    def get(self, key):
+        return None
+
+    def versions(self, tags):
+        return []
+
+    def set(self, key, value, tags, versions):
+        pass
+
+    def invalidate(self, tags):
+        pass
+
+    def size(self):
+        return 0
+
+class ResponseCache:
+    """Counts hits and misses in front of a backend.
+
+    Values must be JSON-serializable. Read the tag versions before loading from
+    the database and pass them to store(), so a value loaded before a concurrent
+    invalidation is never cached.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def versions(self, tags):
+        return self.backend.versions(tags)
+
+    def store(self, key, value, tags, versions):
+        self.backend.set(key, value, tags, versions)
+
+    def invalidate(self, tags):
+        self.backend.invalidate(tags)
+
+    # For async endpoints: a blocking backend runs in a worker thread, the others inline
+    async def _call(self, fn, *args):
+        if self.backend.blocking:
+            return await to_thread.run_sync(fn, *args)
+        return fn(*args)
+
+    async def lookup_async(self, key):
+        return await self._call(self.lookup, key)
+
+    async def versions_async(self, tags):
+        return await self._call(self.versions, tags)
+
+    async def store_async(self, key, value, tags, versions):
+        return await self._call(self.store, key, value, tags, versions)
+
+    async def stats_async(self):
+        return await self._call(self.stats)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+def workflow_tag(workflow_id):
+    return f"workflow:{workflow_id}"
+
+def tags_for_change(change: signals.WorkflowChange):
+    tags = [workflow_tag(change.workflow_id), LIST_PROJECTION_TAG]
+    # Every signoff changes the step-progress summary shown in the list
+    if change.kind in ("created", "signoff") or LIST_FIELDS.intersection(change.fields):
+        tags.append("list")
+    return tags
+
+def make_backend(name=CACHE_BACKEND):
+    if name == "memory":
+        return MemoryBackend(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+    if name == "sqlite":
+        return SQLiteBackend(CACHE_SQLITE_PATH, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+    if name == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND {name!r}")
+
+response_cache = ResponseCache(make_backend())
+
+# One thread, so invalidations handed off from the event loop still apply in commit order
+_invalidator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-invalidate")
+
+def _on_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+def _invalidate(tags):
+    try:
+        response_cache.invalidate(tags)
+    except Exception:
+        logger.exception("Cache invalidation failed for %r", tags)
+
+@signals.subscribe
+def invalidate_for_change(change: signals.WorkflowChange):
+    tags = tags_for_change(change)
+    # With DB_ASYNC=1 writes commit (and publish) on the event loop thread; a blocking
+    # backend would hold the loop for its lock wait, so it invalidates in the background
+    if response_cache.backend.blocking and _on_event_loop():
+        _invalidator.submit(_invalidate, tags)
+    else:
+        response_cache.invalidate(tags)
@@ -1,28 +1,22 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
+from sqlalchemy import String, and_, bindparam, case, cast, func, insert, literal, or_, select, true, tuple_, union_all, update
+from sqlalchemy.orm import Session, load_only, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from . import history, models, schemas, search, sequence, signals, stats
 from datetime import datetime
 from sqlalchemy.exc import NoResultFound
+import base64
 
 # --- Workflow CRUD ---
+def _pending_steps(workflow_id: int):
+    # Every workflow starts with steps 1-8 pending
+    return [
+        {"workflow_id": workflow_id, "step_number": step, "signoff_status": 'Pending'}
+        for step in range(1, 9)
+    ]
+
 def create_workflow(db: Session, workflow: schemas.WorkflowCreate):
-    # Get the next workflow number for auto-generating title
-    latest_workflow = db.query(models.Workflow).order_by(models.Workflow.id.desc()).first()
-    workflow_number = 1  # Default start number
-    
-    if latest_workflow:
-        # Try to extract number from the title if it follows WF##### pattern
-        if latest_workflow.title and latest_workflow.title.startswith('WF'):
-            try:
-                last_number = int(latest_workflow.title[2:])  # Extract numbers after 'WF'
-                workflow_number = last_number + 1
-            except (ValueError, IndexError):
-                # If parsing fails, just use ID + 1
-                workflow_number = latest_workflow.id + 1
-        else:
-            workflow_number = latest_workflow.id + 1
-    
-    # Create formatted title (WF00001 format)
-    auto_title = f"WF{workflow_number:05d}"
+    # Titles come from an atomic sequence, so concurrent creates never collide
+    auto_title = sequence.allocate_workflow_titles(db)[0]
     
     # Create a new dict from workflow data, excluding any provided title
     workflow_data = workflow.dict()
@@ -33,32 +27,312 @@ def create_workflow(db: Session, workflow: schemas.WorkflowCreate):
         **workflow_data,
         status="In Progress",
         current_step=1,
-        last_updated_date=datetime.now()
+        last_updated_date=datetime.utcnow()
     )
     db.add(db_workflow)
+    db.flush()
+    db.execute(insert(models.WorkflowStep), _pending_steps(db_workflow.id))
+    search.index_workflows(db, [db_workflow.id])
+    stats.apply(db, stats.delta(new=stats.snapshot(db_workflow)))
+    sequence.bump_change_version(db)
     db.commit()
     db.refresh(db_workflow)
-    # Add steps 1-8 as pending
-    for step in range(1,9):
-        db_step = models.WorkflowStep(
-            workflow_id=db_workflow.id,
-            step_number=step,
-            signoff_status='Pending'
-        )
-        db.add(db_step)
-    db.commit()
+    signals.publish(signals.WorkflowChange("created", db_workflow.id))
     return db_workflow
 
-def list_workflows(db: Session):
-    return db.query(models.Workflow).all()
+def create_workflows_bulk(db: Session, workflows: list):
+    """Insert many workflows and their 8 steps each in one transaction.
+
+    Both tables are written with executemany-style bulk INSERTs; returns
+    (id, title) pairs in input order.
+    """
+    if not workflows:
+        return []
+    titles = sequence.allocate_workflow_titles(db, len(workflows))
+    now = datetime.utcnow()
+    rows = [
+        {
+            **workflow.model_dump(),
+            "title": title,
+            "status": "In Progress",
+            "current_step": 1,
+            "last_updated_date": now,
+        }
+        for workflow, title in zip(workflows, titles)
+    ]
+    # Core inserts on the tables: the ORM bulk path costs more per row than SQLite does
+    workflows_table, steps_table = models.Workflow.__table__, models.WorkflowStep.__table__
+    # Titles are unique, so ids are matched by title; asking SQLite to return
+    # them in parameter order would fall back to one INSERT per row
+    inserted = db.execute(
+        insert(workflows_table).returning(workflows_table.c.title, workflows_table.c.id), rows
+    ).all()
+    id_by_title = dict(inserted)
+    ids = [id_by_title[title] for title in titles]
+    # The 8 pending steps per workflow in one INSERT ... SELECT instead of 8 parameter sets per row
+    step_numbers = union_all(*(select(literal(step).label("step_number")) for step in range(1, 9))).subquery()
+    db.execute(insert(steps_table).from_select(
+        ["workflow_id", "step_number", "signoff_status"],
+        select(workflows_table.c.id, step_numbers.c.step_number, literal("Pending"))
+        .select_from(workflows_table.join(step_numbers, true()))
+        .where(workflows_table.c.id.in_(ids)),
+    ))
+    search.index_workflows(db, ids)
+    stats.apply(db, stats.delta_added(rows))
+    sequence.bump_change_version(db)
+    db.commit()
+    for workflow_id in ids:
+        signals.publish(signals.WorkflowChange("created", workflow_id))
+    return list(zip(ids, titles))
+
+# Columns needed by schemas.WorkflowList; the list never hydrates the full row
+LIST_COLUMNS = (
+    models.Workflow.id,
+    models.Workflow.title,
+    models.Workflow.current_step,
+    models.Workflow.status,
+    models.Workflow.submit_date,
+)
+# schemas.WorkflowList: LIST_COLUMNS plus the computed step progress
+LIST_DEFAULT_FIELDS = tuple(column.key for column in LIST_COLUMNS) + ("progress",)
+SEARCH_RESULT_COLUMNS = LIST_COLUMNS + (
+    models.Workflow.biller_integration_name,
+    models.Workflow.company_name,
+)
+# Equality filters accepted by list_workflows, each backed by a composite index
+LIST_FILTERS = ("status", "current_step", "integration_type", "category", "business_owner")
+# Columns a fields= projection may select, in response order (id first)
+WORKFLOW_FIELDS = {"id": models.Workflow.id}
+WORKFLOW_FIELDS.update((name, getattr(models.Workflow, name)) for name in schemas.Workflow.model_fields)
+
+def project_fields(fields, extra=()):
+    """Canonical form of a fields= list: the requested names in WORKFLOW_FIELDS order, then `extra`.
+
+    id is always included. `extra` names computed fields the caller allows
+    (e.g. "progress"); anything else raises ValueError.
+    """
+    unknown = set(fields) - WORKFLOW_FIELDS.keys() - set(extra)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in [*WORKFLOW_FIELDS, *extra] if name == "id" or name in fields)
+
+def _encode_key(moment: datetime, row_id: int) -> str:
+    raw = f"{moment.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def encode_cursor(workflow: models.Workflow) -> str:
+    return _encode_key(workflow.submit_date, workflow.id)
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        submit_date, workflow_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(submit_date), int(workflow_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def list_workflows(db: Session, limit: int = 50, cursor: str = None, order: str = "desc", fields=None, **filters):
+    """Return one page of workflows (dicts with `progress`) plus the cursor for the next page (or None).
+
+    Pages are keyed on (submit_date, id) so each page is a bounded index range
+    scan, independent of how many workflows precede it. `fields` limits the
+    selected columns (see list_workflow_rows).
+    """
+    rows, progress, next_cursor = list_workflow_rows(db, limit=limit, cursor=cursor, order=order, fields=fields, **filters)
+    names = LIST_DEFAULT_FIELDS if fields is None else project_fields(fields, extra=("progress",))
+    workflows = []
+    for row in rows:
+        workflow = {name: row._mapping[name] for name in names if name != "progress"}
+        if "progress" in names:
+            workflow["progress"] = progress.get(row.id)
+        workflows.append(workflow)
+    return workflows, next_cursor
+
+def list_workflow_rows(db: Session, limit: int = 50, cursor: str = None, order: str = "desc", fields=None, **filters):
+    """list_workflows as plain row tuples: (rows, {workflow_id: progress}, next_cursor).
+
+    Rows hold LIST_COLUMNS, or with `fields` only those columns in
+    project_fields order (followed by submit_date when it was not requested,
+    for the cursor); progress is only computed when listed. Nothing is loaded
+    into the ORM; serializers.workflow_list_json encodes the result directly.
+    """
+    with_progress = True
+    if fields is None:
+        columns = list(LIST_COLUMNS)
+    else:
+        fields = project_fields(fields, extra=("progress",))
+        columns = [WORKFLOW_FIELDS[name] for name in fields if name in WORKFLOW_FIELDS]
+        with_progress = "progress" in fields
+        if "submit_date" not in fields:
+            columns.append(models.Workflow.submit_date)
+    query = filter_workflows(select(*columns), filters)
+
+    key = tuple_(models.Workflow.submit_date, models.Workflow.id)
+    if cursor:
+        after = decode_cursor(cursor)
+        query = query.where(key < after if order == "desc" else key > after)
+    if order == "desc":
+        query = query.order_by(models.Workflow.submit_date.desc(), models.Workflow.id.desc())
+    else:
+        query = query.order_by(models.Workflow.submit_date.asc(), models.Workflow.id.asc())
+
+    # Fetch one extra row to learn whether another page exists
+    rows = db.execute(query.limit(limit + 1)).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    rows = rows[:limit]
+    progress = step_progress(db, [row.id for row in rows]) if with_progress else {}
+    return rows, progress, next_cursor
+
+def filter_workflows(query, filters):
+    # Apply the list's equality filters (LIST_FILTERS) to a select over workflows
+    for name, value in filters.items():
+        if name not in LIST_FILTERS:
+            raise ValueError(f"Unknown filter: {name}")
+        if value is not None:
+            query = query.where(getattr(models.Workflow, name) == value)
+    return query
+
+def export_workflows_query(fields=None, batch_size: int = 1000, **filters):
+    """SELECT for exports.py: every workflow column (or `fields`) of the filtered workflows, by id.
+
+    The statement streams with yield_per, which uses a server-side cursor where
+    the driver has one, so callers iterate result.partitions() in batches of
+    `batch_size` rows without buffering the whole result.
+    """
+    names = tuple(WORKFLOW_FIELDS) if fields is None else project_fields(fields)
+    query = filter_workflows(select(*(WORKFLOW_FIELDS[name] for name in names)), filters)
+    return query.order_by(models.Workflow.id).execution_options(yield_per=batch_size)
+
+def step_progress(db: Session, workflow_ids):
+    """Signoff counts and the latest signoff for each workflow, in one query.
+
+    Window functions count the steps per workflow and rank them by signoff
+    date, so only the page's workflow_steps rows are read (idx_step_workflow)
+    and no per-workflow query is issued.
+    """
+    if not workflow_ids:
+        return {}
+    Step = models.WorkflowStep
+    per_workflow = dict(partition_by=Step.workflow_id)
+    ranked = (
+        select(
+            Step.workflow_id,
+            Step.step_number,
+            Step.signoff_person,
+            Step.signoff_date,
+            func.sum(case((Step.signoff_status == "Approved", 1), else_=0)).over(**per_workflow).label("approved"),
+            func.sum(case((Step.signoff_status == "Rejected", 1), else_=0)).over(**per_workflow).label("rejected"),
+            func.count().over(**per_workflow).label("total"),
+            func.row_number().over(
+                **per_workflow,
+                order_by=(Step.signoff_date.is_(None), Step.signoff_date.desc(), Step.step_number.desc()),
+            ).label("recency"),
+        )
+        .where(Step.workflow_id.in_(workflow_ids))
+        .subquery()
+    )
+    progress = {}
+    for row in db.execute(select(ranked).where(ranked.c.recency == 1)):
+        progress[row.workflow_id] = {
+            "approved": row.approved,
+            "rejected": row.rejected,
+            "pending": row.total - row.approved - row.rejected,
+            "last_signoff_step": row.step_number if row.signoff_date else None,
+            "last_signoff_by": row.signoff_person if row.signoff_date else None,
+            "last_signoff_at": row.signoff_date,
+        }
+    return progress
+
+# Collections rendered by schemas.WorkflowDetail
+DETAIL_COLLECTIONS = ("attachments", "steps", "edit_history")
+
+def get_workflow(db: Session, workflow_id: int, include=DETAIL_COLLECTIONS):
+    """Load a workflow and the requested collections in exactly 1 + len(include) queries.
+
+    Included collections are fetched with one SELECT ... IN each; excluded ones
+    are set to empty lists without a query. Any other lazy load raises instead
+    of issuing a hidden query.
+    """
+    for name in include:
+        if name not in DETAIL_COLLECTIONS:
+            raise ValueError(f"Unknown collection: {name}")
+    workflow = (
+        db.query(models.Workflow)
+        .options(*(selectinload(getattr(models.Workflow, name)) for name in include), raiseload("*"))
+        .filter(models.Workflow.id == workflow_id)
+        .first()
+    )
+    if workflow is not None:
+        for name in DETAIL_COLLECTIONS:
+            if name not in include:
+                set_committed_value(workflow, name, [])
+    return workflow
+
+# Columns of schemas.Workflow and of each detail collection's schema, in field order
+DETAIL_COLUMNS = tuple(getattr(models.Workflow, name) for name in schemas.Workflow.model_fields)
+DETAIL_COLLECTION_COLUMNS = {
+    "attachments": tuple(getattr(models.Attachment, name) for name in schemas.Attachment.model_fields),
+    "steps": tuple(getattr(models.WorkflowStep, name) for name in schemas.WorkflowStep.model_fields),
+    "edit_history": tuple(getattr(models.EditHistory, name) for name in schemas.EditHistory.model_fields),
+}
+
+def get_workflow_rows(db: Session, workflow_id: int, include=DETAIL_COLLECTIONS, fields=None):
+    """get_workflow as row tuples: (DETAIL_COLUMNS row, {collection: rows}), or (None, {}).
+
+    Same 1 + len(include) queries; collections are ordered by id. With
+    `fields` the workflow row holds only those columns, in project_fields
+    order. Nothing is loaded into the ORM; serializers.workflow_detail_json
+    encodes the result.
+    """
+    for name in include:
+        if name not in DETAIL_COLLECTIONS:
+            raise ValueError(f"Unknown collection: {name}")
+    columns = DETAIL_COLUMNS if fields is None else [WORKFLOW_FIELDS[name] for name in project_fields(fields)]
+    row = db.execute(select(*columns).where(models.Workflow.id == workflow_id)).first()
+    if row is None:
+        return None, {}
+    collections = {}
+    for name in DETAIL_COLLECTIONS:
+        if name in include:
+            columns = DETAIL_COLLECTION_COLUMNS[name]
+            model = columns[0].class_
+            collections[name] = db.execute(
+                select(*columns).where(model.workflow_id == workflow_id).order_by(model.id)
+            ).all()
+    return row, collections
+
+class VersionMismatch(Exception):
+    """The workflow's version is not the one the caller expected (If-Match failed)."""
+
+    def __init__(self, current_version):
+        super().__init__(f"Workflow is at version {current_version}")
+        self.current_version = current_version
 
-def get_workflow(db: Session, workflow_id: int):
-    return db.query(models.Workflow).filter(models.Workflow.id == workflow_id).first()
+def bump_workflow_version(db: Session, workflow_id: int):
+    # Every write that changes a workflow's detail representation moves its version (its ETag)
+    db.execute(
+        update(models.Workflow)
+        .where(models.Workflow.id == workflow_id)
+        .values(version=models.Workflow.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def get_workflow_version(db: Session, workflow_id: int):
+    return db.execute(select(models.Workflow.version).where(models.Workflow.id == workflow_id)).scalar()
+
+def update_workflow(db: Session, workflow_id: int, workflow: schemas.WorkflowUpdate, expected_versions=None):
+    """Apply `workflow` and record the edit; returns the updated workflow or None.
 
-def update_workflow(db: Session, workflow_id: int, workflow: schemas.WorkflowUpdate):
+    The write is a single UPDATE ... WHERE version = <version read>, so an edit
+    that raced another one fails with VersionMismatch instead of silently
+    overwriting it. With `expected_versions` (from If-Match) a stale version
+    fails before anything is written.
+    """
     db_workflow = db.query(models.Workflow).filter(models.Workflow.id == workflow_id).first()
     if not db_workflow:
         return None
+    if expected_versions is not None and db_workflow.version not in expected_versions:
+        raise VersionMismatch(db_workflow.version)
     
     # Track changes for edit history
     changes = {}
@@ -66,67 +340,331 @@ def update_workflow(db: Session, workflow_id: int, workflow: schemas.WorkflowUpd
     
     for key, new_value in updated_data.items():
         old_value = getattr(db_workflow, key)
-        if old_value != new_value:  # Only record if value is actually changing
-            changes[key] = {
-                "old_value": str(old_value) if old_value is not None else None,
-                "new_value": str(new_value) if new_value is not None else None
-            }
+        if not history.same_value(old_value, new_value):
+            changes[key] = (old_value, new_value)
     
-    # Apply the updates
-    for key, value in updated_data.items():
-        setattr(db_workflow, key, value)
-    
-    # Update the timestamp
-    db_workflow.last_updated_date = datetime.now()
+    # Apply the updates and the timestamp in one statement guarded by the version we read
+    before = stats.snapshot(db_workflow)
+    row = _update_returning(
+        db,
+        update(models.Workflow)
+        .where(models.Workflow.id == workflow_id, models.Workflow.version == db_workflow.version)
+        .values({**updated_data, "last_updated_date": datetime.utcnow(), "version": models.Workflow.version + 1})
+        .execution_options(populate_existing=True, synchronize_session=False),
+        (models.Workflow,),
+        (models.Workflow.id == workflow_id,),
+    )
+    updated = row[0] if row is not None else None
+    if updated is None:
+        db.rollback()
+        raise VersionMismatch(get_workflow_version(db, workflow_id))
+    stats.apply(db, stats.delta(before, stats.snapshot(updated)))
     
     # Record edit history if there were changes
     if changes and 'last_updated_by' in updated_data:
         edit_history = models.EditHistory(
             workflow_id=workflow_id,
             edited_by=updated_data['last_updated_by'],
-            edited_at=datetime.now(),
-            changes=changes
+            edited_at=datetime.utcnow(),
+            changes=history.encode_changes(changes),
+            changed_fields=history.changed_fields_key(changes),
         )
         db.add(edit_history)
     
+    if search.SEARCH_COLUMNS.keys() & changes.keys():
+        search.index_workflows(db, [workflow_id])
+    sequence.bump_change_version(db)
+    # Detach the updated row so the commit doesn't expire it (no refresh SELECT)
+    db.flush()
+    db.expunge(updated)
     db.commit()
-    db.refresh(db_workflow)
-    return db_workflow
+    # Published even without field changes: version and last_updated_date always move
+    signals.publish(signals.WorkflowChange(
+        "updated", workflow_id, fields={key: updated_data[key] for key in changes}
+    ))
+    return updated
+
+def list_edit_history(db: Session, workflow_id: int, limit: int = 50, cursor: str = None,
+                      field: str = None, edited_by: str = None):
+    """Return one page of a workflow's edit history, newest first, plus the next cursor.
+
+    Pages are keyed on (edited_at, id) within the workflow, matching
+    idx_edit_history_workflow_edited_at.
+    """
+    History = models.EditHistory
+    query = db.query(History).filter(History.workflow_id == workflow_id)
+    if edited_by is not None:
+        query = query.filter(History.edited_by == edited_by)
+    if field is not None:
+        # Match the name literally: "_" in column names is a LIKE wildcard too
+        literal_field = field.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(or_(
+            History.changed_fields.like(f"%,{literal_field},%", escape="\\"),
+            # Rows written before changed_fields existed
+            and_(History.changed_fields.is_(None),
+                 cast(History.changes, String).like(f'%"{literal_field}"%', escape="\\")),
+        ))
+    if cursor:
+        query = query.filter(tuple_(History.edited_at, History.id) < decode_cursor(cursor))
+    rows = query.order_by(History.edited_at.desc(), History.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_key(rows[limit - 1].edited_at, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def search_workflows(db: Session, q: str, limit: int = 20, cursor: str = None):
+    """Return one page of workflows matching `q`, best match first, plus the next cursor."""
+    matches, next_cursor = search.search_workflows(db, q, limit=limit, cursor=cursor)
+    scores = dict(matches)
+    workflows = (
+        db.query(models.Workflow)
+        .options(load_only(*SEARCH_RESULT_COLUMNS))
+        .filter(models.Workflow.id.in_(scores))
+        .all()
+    )
+    progress = step_progress(db, list(scores))
+    for workflow in workflows:
+        workflow.score = scores[workflow.id]
+        workflow.progress = progress.get(workflow.id)
+    workflows.sort(key=lambda workflow: (workflow.score, workflow.id))
+    return workflows, next_cursor
+
+def get_change_version(db: Session) -> int:
+    # Bumped inside every write transaction in this module; a primary-key lookup
+    return sequence.current_change_version(db)
 
 # --- Attachments ---
-def add_attachment(db: Session, workflow_id: int, file_name: str, file_path: str, description: str = None):
+def add_attachment(db: Session, workflow_id: int, file_name: str, file_path: str, description: str = None,
+                   sha256: str = None, size_bytes: int = None):
     attachment = models.Attachment(
         workflow_id=workflow_id,
         file_name=file_name,
         file_path=file_path,
-        description=description
+        description=description,
+        sha256=sha256,
+        size_bytes=size_bytes
     )
     db.add(attachment)
+    bump_workflow_version(db, workflow_id)
+    sequence.bump_change_version(db)
     db.commit()
     db.refresh(attachment)
+    signals.publish(signals.WorkflowChange("attachment", workflow_id))
     return attachment
 
 def get_attachment(db: Session, attachment_id: int):
     return db.query(models.Attachment).filter(models.Attachment.id == attachment_id).first()
 
 # --- Signoff ---
+class SignoffConflict(Exception):
+    """The step's status was not the one the signoff expected (e.g. a concurrent signoff won)."""
+
+    def __init__(self, current_status=None):
+        super().__init__(
+            f"Step is already {current_status}" if current_status else "A concurrent signoff changed the step"
+        )
+        self.current_status = current_status
+
+STEP_COLUMNS = (
+    models.WorkflowStep.id,
+    models.WorkflowStep.step_number,
+    models.WorkflowStep.signoff_person,
+    models.WorkflowStep.signoff_status,
+    models.WorkflowStep.signoff_date,
+    models.WorkflowStep.remarks,
+)
+
+def _update_returning(db: Session, statement, columns, where):
+    # One round trip with RETURNING; otherwise UPDATE then re-select the same rows
+    if db.get_bind().dialect.update_returning:
+        return db.execute(statement.returning(*columns)).first()
+    if db.execute(statement).rowcount:
+        # populate_existing: an entity in `columns` may already be in the session with its old values
+        return db.execute(select(*columns).where(*where).execution_options(populate_existing=True)).first()
+    return None
+
 def signoff_step(db: Session, workflow_id: int, step_number: int, signoff: schemas.StepSignoff):
-    step = db.query(models.WorkflowStep).filter(
-        models.WorkflowStep.workflow_id == workflow_id,
-        models.WorkflowStep.step_number == step_number
-    ).first()
-    if not step:
-        raise NoResultFound("Step not found")
-    step.signoff_person = signoff.signoff_person
-    step.signoff_status = signoff.signoff_status
-    step.signoff_date = signoff.signoff_date or datetime.now()
-    step.remarks = signoff.remarks
+    """Sign off one step and advance the workflow, in a single transaction.
+
+    The step is only updated while its status is still signoff.expected_status,
+    so of two concurrent signoffs of the same step exactly one succeeds; the
+    other raises SignoffConflict. Raises NoResultFound for an unknown step.
+    """
+    Step, Workflow = models.WorkflowStep, models.Workflow
+    where = (
+        Step.workflow_id == workflow_id,
+        Step.step_number == step_number,
+        Step.signoff_status == signoff.expected_status,
+    )
+    statement = (
+        update(Step)
+        .where(*where)
+        .values(
+            signoff_person=signoff.signoff_person,
+            signoff_status=signoff.signoff_status,
+            signoff_date=signoff.signoff_date or datetime.utcnow(),
+            remarks=signoff.remarks,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Step remarks are searchable: reindex when the signoff sets remarks or clears existing ones
+    reindex = bool(signoff.remarks) or bool(db.execute(select(Step.remarks).where(*where[:2])).scalar())
+    step = _update_returning(db, statement, STEP_COLUMNS, where[:2])
+    if step is None:
+        # Failure path only: tell a missing step from a lost race
+        current_status = db.execute(select(Step.signoff_status).where(*where[:2])).scalar()
+        db.rollback()
+        if current_status is None:
+            raise NoResultFound("Step not found")
+        raise SignoffConflict(current_status)
+
+    fields = {}
+    if signoff.signoff_status == 'Approved' and step_number < 8:
+        # Advance only if the workflow is still waiting on this step
+        advanced = _update_returning(
+            db,
+            update(Workflow)
+            .where(Workflow.id == workflow_id, Workflow.current_step == step_number)
+            .values(current_step=step_number + 1, version=Workflow.version + 1)
+            .execution_options(synchronize_session=False),
+            [getattr(Workflow, name) for name in stats.DIMENSIONS + stats.FEE_COLUMNS],
+            (Workflow.id == workflow_id,),
+        )
+        if advanced is not None:
+            after = dict(advanced._mapping)
+            stats.apply(db, stats.delta({**after, "current_step": step_number}, after))
+            fields["current_step"] = step_number + 1
+    if "current_step" not in fields:
+        bump_workflow_version(db, workflow_id)
+    if reindex:
+        search.index_workflows(db, [workflow_id])
+    sequence.bump_change_version(db)
     db.commit()
-    db.refresh(step)
-    # Optionally, update workflow current_step if approved
-    if signoff.signoff_status == 'Approved':
-        workflow = db.query(models.Workflow).filter(models.Workflow.id == workflow_id).first()
-        if workflow and workflow.current_step == step_number:
-            workflow.current_step = step_number + 1 if step_number < 8 else 8
-            db.commit()
+    signals.publish(signals.WorkflowChange(
+        "signoff", workflow_id, fields=fields, step_number=step_number, step_status=signoff.signoff_status
+    ))
     return step
+
+def signoff_steps_batch(db: Session, items: list):
+    """Apply many step signoffs in one transaction.
+
+    Steps are loaded with one query and written back with one batched UPDATE.
+    Approvals then advance current_step item by item, in order, with the same
+    guarded UPDATE as signoff_step, so a workflow that has already moved on is
+    left alone. Returns one outcome dict per item, in input order, with the
+    workflow's current_step as read back after those UPDATEs. Raises
+    SignoffConflict if another signoff of the same steps commits in between.
+    """
+    Step, Workflow = models.WorkflowStep, models.Workflow
+    keys = {(item.workflow_id, item.step_number) for item in items}
+    steps = {}
+    if keys:
+        for step in db.query(Step).filter(tuple_(Step.workflow_id, Step.step_number).in_(keys)):
+            steps[(step.workflow_id, step.step_number)] = step
+
+    now = datetime.utcnow()
+    outcomes, seen, applied, reindex, step_rows = [], set(), [], set(), []
+    for index, item in enumerate(items):
+        key = (item.workflow_id, item.step_number)
+        outcome = {"index": index, "workflow_id": item.workflow_id, "step_number": item.step_number}
+        step = steps.get(key)
+        if step is None:
+            outcomes.append({**outcome, "status": "not_found"})
+            continue
+        if key in seen:
+            outcomes.append({**outcome, "status": "duplicate"})
+            continue
+        if step.signoff_status != item.expected_status:
+            outcomes.append({**outcome, "status": "conflict"})
+            continue
+        seen.add(key)
+        step_rows.append({
+            "b_id": step.id,
+            "b_expected": item.expected_status,
+            "signoff_person": item.signoff_person,
+            "signoff_status": item.signoff_status,
+            "signoff_date": item.signoff_date or now,
+            "remarks": item.remarks,
+        })
+        if (step.remarks or None) != (item.remarks or None):
+            # Step remarks are searchable
+            reindex.add(item.workflow_id)
+        outcomes.append({**outcome, "status": "applied"})
+        applied.append(item)
+    if not applied:
+        db.rollback()
+        return outcomes
+
+    # One executemany UPDATE for the steps, guarded like signoff_step so a
+    # signoff committed since the SELECT above fails the batch instead of being overwritten
+    table = Step.__table__
+    result = db.execute(
+        update(table).where(table.c.id == bindparam("b_id"), table.c.signoff_status == bindparam("b_expected")),
+        step_rows,
+    )
+    if db.get_bind().dialect.supports_sane_multi_rowcount and result.rowcount != len(step_rows):
+        db.rollback()
+        raise SignoffConflict()
+
+    changes, deltas = [], None
+    columns = [getattr(Workflow, name) for name in stats.DIMENSIONS + stats.FEE_COLUMNS]
+    for item in applied:
+        fields = {}
+        if item.signoff_status == 'Approved' and item.step_number < 8:
+            # Advance only if the workflow is still waiting on this step
+            advanced = _update_returning(
+                db,
+                update(Workflow)
+                .where(Workflow.id == item.workflow_id, Workflow.current_step == item.step_number)
+                .values(current_step=item.step_number + 1)
+                .execution_options(synchronize_session=False),
+                columns,
+                (Workflow.id == item.workflow_id,),
+            )
+            if advanced is not None:
+                after = dict(advanced._mapping)
+                deltas = stats.delta({**after, "current_step": item.step_number}, after, deltas=deltas)
+                fields["current_step"] = after["current_step"]
+        changes.append(signals.WorkflowChange(
+            "signoff", item.workflow_id, fields=fields, step_number=item.step_number, step_status=item.signoff_status
+        ))
+    workflow_ids = sorted({change.workflow_id for change in changes})
+    current_steps = dict(db.execute(
+        select(Workflow.id, Workflow.current_step).where(Workflow.id.in_(workflow_ids))
+    ).all())
+    for outcome in outcomes:
+        outcome["current_step"] = current_steps.get(outcome["workflow_id"])
+
+    # Versions move in SQL, so a signoff committed since the SELECT above is not overwritten
+    workflow_table = Workflow.__table__
+    db.execute(
+        update(workflow_table)
+        .where(workflow_table.c.id == bindparam("b_id"))
+        .values(version=workflow_table.c.version + 1),
+        [{"b_id": workflow_id} for workflow_id in workflow_ids],
+    )
+    search.index_workflows(db, sorted(reindex))
+    if deltas:
+        stats.apply(db, deltas)
+    sequence.bump_change_version(db)
+    db.commit()
+    for change in changes:
+        signals.publish(change)
+    return outcomes
+
+# --- Dashboard stats ---
+def get_stats(db: Session):
+    return stats.read(db)
+
+def reconcile_stats(db: Session, repair: bool = False):
+    """Recompute the dashboard aggregates from scratch and report drift; optionally repair it."""
+    drift = stats.reconcile(db, repair=repair)
+    if repair and drift:
+        sequence.bump_change_version(db)
+        db.commit()
+    else:
+        db.rollback()
+    return drift
+
+def seed_stats(db: Session):
+    # Databases that predate workflow_stats: fill it once before serving writes
+    if db.query(models.WorkflowStat).first() is None and db.query(models.Workflow.id).first() is not None:
+        reconcile_stats(db, repair=True)
@@ -0,0 +1,66 @@
+"""Awaitable versions of the db/crud.py functions.
+
+Each function accepts either an AsyncSession (DB_ASYNC=1) or a regular Session.
+With an AsyncSession the CRUD code runs through AsyncSession.run_sync, so every
+statement is awaited on the async driver without tying up a thread. With a
+Session it runs in a worker thread, exactly like a sync endpoint would.
+"""
+from anyio import to_thread
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud
+import functools
+
+async def _run(db, fn, *args, **kwargs):
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await to_thread.run_sync(functools.partial(fn, db, *args, **kwargs))
+
+# --- Workflow CRUD ---
+async def create_workflow(db, workflow):
+    return await _run(db, crud.create_workflow, workflow)
+
+async def create_workflows_bulk(db, workflows):
+    return await _run(db, crud.create_workflows_bulk, workflows)
+
+async def list_workflow_rows(db, **kwargs):
+    return await _run(db, crud.list_workflow_rows, **kwargs)
+
+async def get_workflow_rows(db, workflow_id, include=crud.DETAIL_COLLECTIONS, fields=None):
+    return await _run(db, crud.get_workflow_rows, workflow_id, include=include, fields=fields)
+
+async def update_workflow(db, workflow_id, workflow, expected_versions=None):
+    return await _run(db, crud.update_workflow, workflow_id, workflow, expected_versions=expected_versions)
+
+async def get_workflow_version(db, workflow_id):
+    return await _run(db, crud.get_workflow_version, workflow_id)
+
+async def list_edit_history(db, workflow_id, **kwargs):
+    return await _run(db, crud.list_edit_history, workflow_id, **kwargs)
+
+async def search_workflows(db, q, **kwargs):
+    return await _run(db, crud.search_workflows, q, **kwargs)
+
+async def get_change_version(db):
+    return await _run(db, crud.get_change_version)
+
+# --- Attachments ---
+async def add_attachment(db, workflow_id, file_name, file_path, description=None, sha256=None, size_bytes=None):
+    return await _run(db, crud.add_attachment, workflow_id, file_name, file_path, description,
+                      sha256=sha256, size_bytes=size_bytes)
+
+async def get_attachment(db, attachment_id):
+    return await _run(db, crud.get_attachment, attachment_id)
+
+# --- Signoff ---
+async def signoff_step(db, workflow_id, step_number, signoff):
+    return await _run(db, crud.signoff_step, workflow_id, step_number, signoff)
+
+async def signoff_steps_batch(db, items):
+    return await _run(db, crud.signoff_steps_batch, items)
+
+# --- Dashboard stats ---
+async def get_stats(db):
+    return await _run(db, crud.get_stats)
+
+async def reconcile_stats(db, repair=False):
+    return await _run(db, crud.reconcile_stats, repair=repair)
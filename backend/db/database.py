@@ -1,10 +1,148 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+import contextvars
+import json
 import os
+import time
 
 # Update with SQLite database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./workflow.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+# --- Engine profiles (DB_PROFILE) ---
+# "default" keeps SQLite's stock behaviour. "production" runs the pragmas below on
+# every new connection: WAL lets readers proceed while a writer commits,
+# synchronous=NORMAL fsyncs only at checkpoints, and busy_timeout makes writers
+# wait for the lock instead of failing with "database is locked".
+ENGINE_PROFILES = {
+    "default": {
+        "pragmas": {},
+        "pool": {},
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,       # ms
+            "cache_size": -64000,       # negative = KiB, i.e. 64 MiB per connection
+            "mmap_size": 268435456,     # 256 MiB of the file read through mmap
+            "temp_store": "MEMORY",
+        },
+        "pool": {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30,
+            "pool_recycle": 3600,
+        },
+    },
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "default")
+if DB_PROFILE not in ENGINE_PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE {DB_PROFILE!r}, expected one of {sorted(ENGINE_PROFILES)}")
+
+# Individual settings can be overridden on top of the profile,
+# e.g. SQLITE_BUSY_TIMEOUT=10000 or DB_POOL_SIZE=50
+SQLITE_PRAGMAS = dict(ENGINE_PROFILES[DB_PROFILE]["pragmas"])
+for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store"):
+    if os.getenv(f"SQLITE_{name.upper()}"):
+        SQLITE_PRAGMAS[name] = os.getenv(f"SQLITE_{name.upper()}")
+
+POOL_OPTIONS = dict(ENGINE_PROFILES[DB_PROFILE]["pool"])
+for name in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+    if os.getenv(f"DB_{name.upper()}"):
+        POOL_OPTIONS[name] = int(os.getenv(f"DB_{name.upper()}"))
+
+def _compact_json(value):
+    # JSON columns (edit history) are stored without the default ", " / ": " padding
+    return json.dumps(value, separators=(",", ":"))
+
+def engine_options(url: str) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return {"json_serializer": _compact_json, **POOL_OPTIONS}
+    if parsed.database in (None, "", ":memory:"):
+        # In-memory databases live in a single connection; pool sizing does not apply
+        return {"connect_args": {"check_same_thread": False}, "json_serializer": _compact_json}
+    return {"connect_args": {"check_same_thread": False}, "json_serializer": _compact_json, **POOL_OPTIONS}
+
+def apply_sqlite_pragmas(engine):
+    if engine.dialect.name != "sqlite" or not SQLITE_PRAGMAS:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+# --- Statement instrumentation ---
+# Per-request SQL accounting: the metrics middleware puts a collector here, and
+# every statement / connection checkout made while handling the request reports
+# to it (collector.statement(sql, seconds), collector.checkout(seconds)).
+# Outside a request nothing is recorded.
+sql_collector = contextvars.ContextVar("sql_collector", default=None)
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        collector = sql_collector.get()
+        if collector is not None:
+            collector.statement(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(context):
+        # after_cursor_execute does not run for a failed statement
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
+
+    # Time spent waiting for the pool (including opening a new connection). There is
+    # no "before checkout" pool event, so the engine's own entry point is wrapped.
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            collector = sql_collector.get()
+            if collector is not None:
+                collector.checkout(time.perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+apply_sqlite_pragmas(engine)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# --- Async engine (DB_ASYNC=1) ---
+# The same database through an async driver, so endpoints await I/O on the event
+# loop instead of holding one of Starlette's threadpool workers per request.
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()]).render_as_string(hide_password=False)
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_database_url(DATABASE_URL))
+    async_options = engine_options(ASYNC_DATABASE_URL)
+    async_options.pop("connect_args", None)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_options)
+    apply_sqlite_pragmas(async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine)
+    # Nothing may lazy-load once a request leaves the session, so keep loaded state on commit
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
@@ -0,0 +1,45 @@
+"""Compact encoding of EditHistory.changes.
+
+crud.update_workflow stores {field: [old, new]} with JSON-typed values:
+numbers and booleans stay as they are, Decimals become plain numbers, and
+dates and datetimes become ISO strings. Older rows used
+{field: {"old_value": str, "new_value": str}}; decode_changes reads both and
+always returns the {"old_value", "new_value"} shape the API exposes.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+def encode_value(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def same_value(old, new):
+    """Whether an update leaves a value unchanged once both sides are encoded.
+
+    A date and a datetime are compared as dates, so a Date column given a
+    datetime on the same day is not an edit; Decimal(0.1000) and 0.1 are equal.
+    """
+    if isinstance(old, datetime) != isinstance(new, datetime) and isinstance(old, date) and isinstance(new, date):
+        old, new = [value.date() if isinstance(value, datetime) else value for value in (old, new)]
+    return encode_value(old) == encode_value(new)
+
+def encode_changes(changes):
+    # changes: {field: (old, new)}
+    return {field: [encode_value(old), encode_value(new)] for field, (old, new) in changes.items()}
+
+def decode_changes(changes):
+    decoded = {}
+    for field, change in (changes or {}).items():
+        if isinstance(change, dict):
+            old, new = change.get("old_value"), change.get("new_value")
+        else:
+            old, new = change
+        decoded[field] = {"old_value": old, "new_value": new}
+    return decoded
+
+def changed_fields_key(fields):
+    # ",a,b," so a single field matches with LIKE '%,name,%'
+    return "," + ",".join(sorted(fields)) + ","
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Numeric, ForeignKey, Text, JSON
+from sqlalchemy import BigInteger, Column, PrimaryKeyConstraint, Integer, String, Boolean, Date, DateTime, Numeric, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship, declarative_base
 import datetime
 
@@ -52,9 +52,22 @@ class Workflow(Base):
     status = Column(String(20), nullable=False)
     submit_date = Column(DateTime, default=datetime.datetime.utcnow)
     last_updated_date = Column(DateTime, default=datetime.datetime.utcnow)
+    # Incremented by every write to the workflow, its steps or attachments; the detail ETag
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     attachments = relationship("Attachment", back_populates="workflow")
     steps = relationship("WorkflowStep", back_populates="workflow")
     edit_history = relationship("EditHistory", back_populates="workflow")
+    # Composite indexes matching the list endpoint's access paths: an optional
+    # equality filter followed by the (submit_date, id) keyset ordering.
+    __table_args__ = (
+        Index("idx_workflow_submit_date_id", "submit_date", "id"),
+        Index("idx_workflow_status_submit_date", "status", "submit_date", "id"),
+        Index("idx_workflow_current_step_submit_date", "current_step", "submit_date", "id"),
+        Index("idx_workflow_integration_type_submit_date", "integration_type", "submit_date", "id"),
+        Index("idx_workflow_category_submit_date", "category", "submit_date", "id"),
+        Index("idx_workflow_business_owner_submit_date", "business_owner", "submit_date", "id"),
+        Index("idx_workflow_last_updated_date", "last_updated_date"),
+    )
 
 class Attachment(Base):
     __tablename__ = "attachments"
@@ -66,6 +79,8 @@ class Attachment(Base):
     uploaded_by = Column(String(100))
     uploaded_at = Column(DateTime, default=datetime.datetime.utcnow)
     description = Column(Text)
+    sha256 = Column(String(64))
+    size_bytes = Column(BigInteger)
     workflow = relationship("Workflow", back_populates="attachments")
 
 class EditHistory(Base):
@@ -75,7 +90,12 @@ class EditHistory(Base):
     edited_by = Column(String(100))
     edited_at = Column(DateTime, default=datetime.datetime.utcnow)
     changes = Column(JSON, nullable=False)
+    changed_fields = Column(String(1000))  # ",field_a,field_b," for the history field filter
     workflow = relationship("Workflow", back_populates="edit_history")
+    # Keyset pagination of one workflow's history, newest first
+    __table_args__ = (
+        Index("idx_edit_history_workflow_edited_at", "workflow_id", "edited_at", "id"),
+    )
 
 class WorkflowStep(Base):
     __tablename__ = "workflow_steps"
@@ -87,3 +107,45 @@ class WorkflowStep(Base):
     signoff_date = Column(DateTime)
     remarks = Column(Text)
     workflow = relationship("Workflow", back_populates="steps")
+    __table_args__ = (
+        Index("idx_step_workflow", "workflow_id"),
+        Index("idx_step_signoff_date", "signoff_date"),
+    )
+
+class Sequence(Base):
+    # Named counters handed out atomically by db/sequence.py
+    __tablename__ = "sequences"
+    name = Column(String(50), primary_key=True)
+    next_value = Column(BigInteger, nullable=False)
+
+class SchedulerLease(Base):
+    # Which worker process runs a singleton background task (notifications.py)
+    __tablename__ = "scheduler_leases"
+    name = Column(String(50), primary_key=True)
+    owner = Column(String(100), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class SentReminder(Base):
+    # The SLA reminder last sent per workflow and kind (notifications.py), so a
+    # restart or lease takeover does not send it again
+    __tablename__ = "sla_reminders_sent"
+    workflow_id = Column(Integer, ForeignKey("workflows.id"), nullable=False)
+    kind = Column(String(30), nullable=False)
+    due_at = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime, nullable=False)
+    __table_args__ = (
+        PrimaryKeyConstraint("workflow_id", "kind"),
+    )
+
+class WorkflowStat(Base):
+    # Dashboard aggregates maintained incrementally by db/stats.py
+    __tablename__ = "workflow_stats"
+    dimension = Column(String(30), nullable=False)   # status, current_step, ... or "all"
+    value = Column(String(100), nullable=False)      # "" for NULL and for the "all" row
+    workflows = Column(BigInteger, nullable=False, default=0)
+    setup_fee_total = Column(Numeric(16,4), nullable=False, default=0)
+    maintenance_fee_total = Column(Numeric(16,4), nullable=False, default=0)
+    portal_fee_total = Column(Numeric(16,4), nullable=False, default=0)
+    __table_args__ = (
+        PrimaryKeyConstraint("dimension", "value"),
+    )
@@ -49,6 +49,7 @@ CREATE TABLE workflows (
     last_updated_by VARCHAR(100),
     last_updated_date TIMESTAMP NOT NULL DEFAULT NOW(),
     go_live_date DATE,
+    version INTEGER NOT NULL DEFAULT 1,  -- bumped by every write; detail ETag / If-Match
     logo_attachment_id INTEGER,
     edit_history_id INTEGER
 );
@@ -62,7 +63,9 @@ CREATE TABLE attachments (
     file_path VARCHAR(255) NOT NULL,
     uploaded_by VARCHAR(100),
     uploaded_at TIMESTAMP NOT NULL DEFAULT NOW(),
-    description TEXT
+    description TEXT,
+    sha256 CHAR(64),
+    size_bytes BIGINT
 );
 
 -- Edit History Table
@@ -71,7 +74,8 @@ CREATE TABLE edit_history (
     workflow_id INTEGER REFERENCES workflows(id) ON DELETE CASCADE,
     edited_by VARCHAR(100),
     edited_at TIMESTAMP NOT NULL DEFAULT NOW(),
-    changes JSONB NOT NULL
+    changes JSONB NOT NULL,           -- {field: [old, new]}; older rows {field: {old_value, new_value}}
+    changed_fields VARCHAR(1000)      -- ',field_a,field_b,' for filtering by field
 );
 
 -- Workflow Steps Sign-Off Tracking
@@ -85,11 +89,57 @@ CREATE TABLE workflow_steps (
     remarks TEXT
 );
 
+-- Named counters (e.g. the WFxxxxx title sequence), incremented atomically
+CREATE TABLE sequences (
+    name VARCHAR(50) PRIMARY KEY,
+    next_value BIGINT NOT NULL
+);
+
+-- Singleton background tasks (notifications.py): the owner renews its lease; others take over once it expires
+CREATE TABLE scheduler_leases (
+    name VARCHAR(50) PRIMARY KEY,
+    owner VARCHAR(100) NOT NULL,
+    expires_at TIMESTAMP NOT NULL
+);
+
+-- Last SLA reminder sent per workflow and kind (notifications.py), kept across restarts and takeovers
+CREATE TABLE sla_reminders_sent (
+    workflow_id INTEGER NOT NULL REFERENCES workflows(id),
+    kind VARCHAR(30) NOT NULL,
+    due_at TIMESTAMP NOT NULL,
+    sent_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (workflow_id, kind)
+);
+
+-- Dashboard aggregates (db/stats.py): one row per (dimension, value), plus ('all', '') totals
+CREATE TABLE workflow_stats (
+    dimension VARCHAR(30) NOT NULL,
+    value VARCHAR(100) NOT NULL,
+    workflows BIGINT NOT NULL DEFAULT 0,
+    setup_fee_total NUMERIC(16,4) NOT NULL DEFAULT 0,
+    maintenance_fee_total NUMERIC(16,4) NOT NULL DEFAULT 0,
+    portal_fee_total NUMERIC(16,4) NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, value)
+);
+
 -- Indexes for performance
-CREATE INDEX idx_workflow_current_step ON workflows(current_step);
-CREATE INDEX idx_workflow_status ON workflows(status);
+-- Keyset pagination on (submit_date, id), optionally behind one equality filter
+CREATE INDEX idx_workflow_submit_date_id ON workflows(submit_date, id);
+CREATE INDEX idx_workflow_status_submit_date ON workflows(status, submit_date, id);
+CREATE INDEX idx_workflow_current_step_submit_date ON workflows(current_step, submit_date, id);
+CREATE INDEX idx_workflow_integration_type_submit_date ON workflows(integration_type, submit_date, id);
+CREATE INDEX idx_workflow_category_submit_date ON workflows(category, submit_date, id);
+CREATE INDEX idx_workflow_business_owner_submit_date ON workflows(business_owner, submit_date, id);
+CREATE INDEX idx_edit_history_workflow_edited_at ON edit_history(workflow_id, edited_at, id);
 CREATE INDEX idx_attachment_workflow ON attachments(workflow_id);
+-- Also serves the list's per-page step-progress query
 CREATE INDEX idx_step_workflow ON workflow_steps(workflow_id);
+-- The SLA scheduler's periodic "changed since" query (notifications.py)
+CREATE INDEX idx_workflow_last_updated_date ON workflows(last_updated_date);
+CREATE INDEX idx_step_signoff_date ON workflow_steps(signoff_date);
+
+-- Full-text search: on SQLite, db/search.py manages an FTS5 table (workflow_search);
+-- on PostgreSQL GET /workflows/search falls back to ILIKE over the same columns
 
 -- Sample enum for file_type in attachments: 'logo', 'production_form', 'gl_flow_screenshot', 'other'
 
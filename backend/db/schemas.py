@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List, Any
 from datetime import date, datetime
+from .history import decode_changes
 
 class Attachment(BaseModel):
     id: int
@@ -10,14 +11,22 @@ class Attachment(BaseModel):
     uploaded_by: Optional[str]
     uploaded_at: datetime
     description: Optional[str]
+    sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
     class Config:
         from_attributes = True
 
 class EditHistory(BaseModel):
     id: int
+    workflow_id: Optional[int] = None
     edited_by: Optional[str]
     edited_at: datetime
     changes: Any
+    # Both the compact and the legacy storage formats come out as {field: {old_value, new_value}}
+    @field_validator("changes")
+    @classmethod
+    def normalize_changes(cls, value):
+        return decode_changes(value)
     class Config:
         from_attributes = True
 
@@ -110,27 +119,82 @@ class Workflow(WorkflowBase):
     current_step: int
     status: str
     last_updated_date: datetime
+    version: Optional[int] = None
     class Config:
         from_attributes = True
 
+class StepProgress(BaseModel):
+    approved: int = 0
+    rejected: int = 0
+    pending: int = 0
+    last_signoff_step: Optional[int] = None
+    last_signoff_by: Optional[str] = None
+    last_signoff_at: Optional[datetime] = None
+
 class WorkflowList(BaseModel):
     id: int
     title: str
     current_step: int
     status: str
     submit_date: datetime
+    progress: Optional[StepProgress] = None
     class Config:
         from_attributes = True
 
+class WorkflowSearchResult(WorkflowList):
+    biller_integration_name: str
+    company_name: Optional[str] = None
+    score: float  # bm25; lower is a better match
+
 class WorkflowDetail(Workflow):
     attachments: List[Attachment] = []
     steps: List[WorkflowStep] = []
     edit_history: List[EditHistory] = []
 
+class BulkWorkflowItem(BaseModel):
+    index: int
+    id: Optional[int] = None
+    title: Optional[str] = None
+    errors: Optional[List[Any]] = None
+
+class BulkWorkflowResult(BaseModel):
+    created: int
+    failed: int
+    items: List[BulkWorkflowItem]
+
+class ImportRowError(BaseModel):
+    row: int  # 1-based record number in the file, header excluded
+    errors: List[Any]
+
+class ImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False  # more rows failed than are listed
+    error: Optional[str] = None  # set when the file could not be read to the end
+
 class StepSignoff(BaseModel):
     signoff_person: str
     signoff_status: str
     remarks: Optional[str]
     signoff_date: Optional[datetime] = None
+    # The signoff only applies while the step still has this status (409 otherwise)
+    expected_status: str = "Pending"
+
+class BatchSignoffItem(StepSignoff):
+    workflow_id: int
+    step_number: int
+
+class BatchSignoffOutcome(BaseModel):
+    index: int
+    workflow_id: int
+    step_number: int
+    status: str                         # "applied", "not_found", "duplicate" or "conflict"
+    current_step: Optional[int] = None  # the workflow's step after the batch
+
+class BatchSignoffResult(BaseModel):
+    applied: int
+    failed: int
+    items: List[BatchSignoffOutcome]
 
 
@@ -0,0 +1,165 @@
+"""Full-text search over workflows with an SQLite FTS5 index.
+
+workflow_search holds one row per workflow (rowid = workflow id) with the
+searchable columns plus the workflow's step remarks. crud.py re-indexes a
+workflow inside the same transaction that changes it, so the index never
+drifts from committed data. A database without the table (an existing file,
+or a new one) gets it created and filled on first use; rebuild() and
+rebuild_search.py drop and refill it on demand.
+
+Databases without FTS5 (e.g. PostgreSQL) fall back to an unranked LIKE scan.
+"""
+from sqlalchemy import or_, text
+from sqlalchemy.exc import OperationalError
+from . import models
+import base64
+import re
+import threading
+
+# Workflow columns in the index, in order, with their bm25 weights
+SEARCH_COLUMNS = {
+    "title": 10.0,
+    "biller_integration_name": 8.0,
+    "company_name": 5.0,
+    "business_owner": 3.0,
+    "remarks": 1.0,
+}
+STEP_REMARKS_WEIGHT = 1.0
+
+_available = {}
+_available_lock = threading.Lock()
+
+def _key(bind):
+    # The database itself, not the driver: the async engine's sync_engine
+    # (sqlite+aiosqlite) and the sync engine (sqlite) share one answer
+    return bind.dialect.name, bind.url.database
+
+def _create_table(conn):
+    columns = ", ".join(list(SEARCH_COLUMNS) + ["step_remarks"])
+    # prefix= keeps 2 and 3 character prefix queries off the full-scan path
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE workflow_search USING fts5({columns}, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+
+def _index_sql(where=""):
+    columns = ", ".join(SEARCH_COLUMNS)
+    selected = ", ".join(f"w.{name}" for name in SEARCH_COLUMNS)
+    return text(
+        f"INSERT INTO workflow_search (rowid, {columns}, step_remarks) "
+        f"SELECT w.id, {selected}, "
+        "(SELECT group_concat(s.remarks, ' ') FROM workflow_steps s WHERE s.workflow_id = w.id) "
+        f"FROM workflows w {where}"
+    )
+
+def _prepare(conn) -> bool:
+    # Create and fill the index if it is missing; False when SQLite lacks FTS5
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'workflow_search'"
+    )).first()
+    if exists:
+        return True
+    try:
+        _create_table(conn)
+    except OperationalError:
+        return False
+    conn.execute(_index_sql())
+    return True
+
+def is_available(bind) -> bool:
+    """True when `bind` is SQLite with FTS5. Call outside any write transaction."""
+    key = _key(bind)
+    with _available_lock:
+        if key in _available:
+            return _available[key]
+    available = False
+    if bind.dialect.name == "sqlite":
+        with bind.begin() as conn:
+            available = _prepare(conn)
+    with _available_lock:
+        _available[key] = available
+    return available
+
+def index_workflows(db, workflow_ids):
+    """Re-index `workflow_ids` in the caller's transaction; flush ORM changes first."""
+    bind = db.get_bind()
+    if not workflow_ids or bind.dialect.name != "sqlite":
+        return
+    available = _available.get(_key(bind))
+    if available is None:
+        # Not checked yet in this process (e.g. a script): check, and create the
+        # table if needed, inside the caller's transaction without caching the answer
+        available = _prepare(db.connection())
+    if not available:
+        return
+    ids = ", ".join(str(int(workflow_id)) for workflow_id in workflow_ids)
+    db.execute(text(f"DELETE FROM workflow_search WHERE rowid IN ({ids})"))
+    db.execute(_index_sql(f"WHERE w.id IN ({ids})"))
+
+def rebuild(bind):
+    """Drop and refill the whole index; returns the number of indexed workflows."""
+    with bind.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS workflow_search"))
+        _create_table(conn)
+        count = conn.execute(_index_sql()).rowcount
+    with _available_lock:
+        _available[_key(bind)] = True
+    return count
+
+def match_expression(q: str) -> str:
+    # Every word must match, each as a prefix: "acme pay" -> "acme"* AND "pay"*
+    words = re.findall(r"\w+", q)
+    if not words:
+        raise ValueError("Search query must contain at least one word")
+    return " AND ".join(f'"{word}"*' for word in words)
+
+def _encode_cursor(score, workflow_id):
+    raw = f"{score!r}|{workflow_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, workflow_id = raw.rsplit("|", 1)
+        return float(score), int(workflow_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def search_workflows(db, q: str, limit: int = 20, cursor: str = None):
+    """Return ([(workflow_id, score)], next_cursor), best match first.
+
+    Results are ordered by (bm25 score, id) and paged with a cursor on that
+    pair. Lower scores are better matches.
+    """
+    if not is_available(db.get_bind()):
+        return _search_like(db, q, limit, cursor)
+    weights = ", ".join(str(weight) for weight in list(SEARCH_COLUMNS.values()) + [STEP_REMARKS_WEIGHT])
+    params = {"match": match_expression(q), "limit": limit + 1}
+    after = ""
+    if cursor:
+        params["score"], params["id"] = _decode_cursor(cursor)
+        after = "WHERE score > :score OR (score = :score AND id > :id)"
+    rows = db.execute(text(
+        "SELECT id, score FROM ("
+        f"  SELECT rowid AS id, bm25(workflow_search, {weights}) AS score"
+        "   FROM workflow_search WHERE workflow_search MATCH :match"
+        f") {after} ORDER BY score, id LIMIT :limit"
+    ), params).all()
+    next_cursor = _encode_cursor(rows[limit - 1].score, rows[limit - 1].id) if len(rows) > limit else None
+    return [tuple(row) for row in rows[:limit]], next_cursor
+
+def _search_like(db, q, limit, cursor):
+    # Unranked fallback: every word must appear in one of the searched columns
+    words = re.findall(r"\w+", q)
+    if not words:
+        raise ValueError("Search query must contain at least one word")
+    query = db.query(models.Workflow.id)
+    for word in words:
+        query = query.filter(or_(*(
+            getattr(models.Workflow, name).ilike(f"%{word}%") for name in SEARCH_COLUMNS
+        )))
+    if cursor:
+        query = query.filter(models.Workflow.id > _decode_cursor(cursor)[1])
+    ids = [row.id for row in query.order_by(models.Workflow.id).limit(limit + 1)]
+    next_cursor = _encode_cursor(0.0, ids[limit - 1]) if len(ids) > limit else None
+    return [(workflow_id, 0.0) for workflow_id in ids[:limit]], next_cursor
@@ -0,0 +1,122 @@
+from collections import deque
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from . import models
+import os
+import threading
+
+# Numbers reserved per round trip to the sequences table. Blocks let each worker
+# process allocate most titles from memory instead of paying an extra transaction
+# per create. Titles stay unique but may have gaps (numbers reserved by a worker
+# that exits unused, and titles are not in creation order across workers); set 1
+# if gapless titles matter more than that transaction.
+WORKFLOW_TITLE_BLOCK_SIZE = int(os.getenv("WORKFLOW_TITLE_BLOCK_SIZE", "50"))
+
+class BlockAllocator:
+    """Allocates unique numbers from a named row in the sequences table.
+
+    A reservation is one atomic UPDATE ... RETURNING committed in its own
+    transaction, so concurrent workers never receive the same number and the
+    caller's insert transaction does not hold the counter row. Reserved numbers
+    are served from memory; the lock is never held across database I/O.
+    """
+
+    def __init__(self, name, block_size=1, seed=None):
+        self.name = name
+        self.block_size = max(1, block_size)
+        self.seed = seed or (lambda conn: 1)
+        self._lock = threading.Lock()
+        self._free = deque()  # reserved [start, end) ranges not yet handed out
+
+    def allocate(self, bind, count=1):
+        numbers = []
+        while True:
+            with self._lock:
+                while self._free and len(numbers) < count:
+                    start, end = self._free.popleft()
+                    take = min(count - len(numbers), end - start)
+                    numbers.extend(range(start, start + take))
+                    if start + take < end:
+                        self._free.appendleft((start + take, end))
+            if len(numbers) == count:
+                return numbers
+            reserved = self._reserve(bind, max(self.block_size, count - len(numbers)))
+            with self._lock:
+                self._free.append(reserved)
+
+    def _reserve(self, bind, count):
+        table = models.Sequence
+        with bind.begin() as conn:
+            while True:
+                bump = (
+                    update(table)
+                    .where(table.name == self.name)
+                    .values(next_value=table.next_value + count)
+                )
+                if conn.dialect.update_returning:
+                    end = conn.execute(bump.returning(table.next_value)).scalar()
+                elif conn.execute(bump).rowcount:
+                    end = conn.execute(select(table.next_value).where(table.name == self.name)).scalar()
+                else:
+                    end = None
+                if end is not None:
+                    return end - count, end
+                # First use on this database: create the row, tolerating a concurrent creator
+                try:
+                    with conn.begin_nested():
+                        conn.execute(insert(table).values(name=self.name, next_value=self.seed(conn)))
+                except IntegrityError:
+                    pass
+
+def _seed_workflow_title(conn):
+    # Continue after the highest existing WFxxxxx title (or row id) on pre-existing databases
+    title = conn.execute(
+        select(models.Workflow.title)
+        .where(models.Workflow.title.like("WF%"))
+        .order_by(func.length(models.Workflow.title).desc(), models.Workflow.title.desc())
+        .limit(1)
+    ).scalar()
+    last_id = conn.execute(select(func.max(models.Workflow.id))).scalar() or 0
+    try:
+        last_number = int(title[2:]) if title else 0
+    except ValueError:
+        last_number = 0
+    return max(last_number, last_id) + 1
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+def workflow_title_allocator(bind):
+    # One allocator per database, shared by every session in this process
+    key = str(bind.url)
+    with _allocators_lock:
+        if key not in _allocators:
+            _allocators[key] = BlockAllocator(
+                "workflow_title", WORKFLOW_TITLE_BLOCK_SIZE, seed=_seed_workflow_title
+            )
+        return _allocators[key]
+
+def allocate_workflow_titles(db, count=1):
+    """Return `count` unique WFxxxxx titles. Call before writing in `db`'s transaction."""
+    bind = db.get_bind()
+    return [f"WF{number:05d}" for number in workflow_title_allocator(bind).allocate(bind, count)]
+
+# --- Change version ---
+# A single counter bumped inside every write transaction in crud.py. Readers
+# compare it with a client's ETag to answer 304 without querying workflows.
+CHANGE_VERSION = "change_version"
+
+def bump_change_version(db):
+    table = models.Sequence
+    bump = update(table).where(table.name == CHANGE_VERSION).values(next_value=table.next_value + 1)
+    if db.execute(bump).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(table).values(name=CHANGE_VERSION, next_value=1))
+    except IntegrityError:
+        db.execute(bump)
+
+def current_change_version(db):
+    table = models.Sequence
+    return db.execute(select(table.next_value).where(table.name == CHANGE_VERSION)).scalar() or 0
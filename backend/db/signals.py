@@ -0,0 +1,38 @@
+"""Post-commit change notifications from db/crud.py.
+
+Write paths publish a WorkflowChange once their transaction has committed.
+Caches, event streams and schedulers subscribe here rather than being called
+from the CRUD code directly.
+"""
+from dataclasses import dataclass, field
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class WorkflowChange:
+    kind: str                       # "created", "updated", "signoff" or "attachment"
+    workflow_id: int
+    fields: dict = field(default_factory=dict)  # changed workflow columns -> new values
+    step_number: Optional[int] = None
+    step_status: Optional[str] = None
+
+_subscribers = []
+
+def subscribe(callback):
+    """Register `callback(change)`; usable as a decorator."""
+    _subscribers.append(callback)
+    return callback
+
+def unsubscribe(callback):
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+def publish(change: WorkflowChange):
+    # Subscribers must not be able to fail a write that has already committed
+    for callback in list(_subscribers):
+        try:
+            callback(change)
+        except Exception:
+            logger.exception("Change subscriber %r failed for %r", callback, change)
@@ -0,0 +1,159 @@
+"""Dashboard aggregates kept in the workflow_stats summary table.
+
+One row per (dimension, value) holds the number of workflows with that value
+and the sum of their fees; the ("all", "") row holds the overall totals.
+crud.py applies the difference between a workflow's old and new values
+inside the write transaction, which touches at most two rows per dimension
+regardless of how many workflows exist. reconcile() recomputes everything
+with GROUP BYs and reports (and optionally repairs) any drift, e.g. after
+rows were written outside crud.py.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from . import models
+
+DIMENSIONS = ("status", "current_step", "integration_type", "category")
+FEE_COLUMNS = ("setup_fee", "maintenance_fee", "portal_fee")
+TOTAL = ("all", "")
+
+def _key_value(value):
+    return "" if value is None else str(value)
+
+def _fee(value):
+    return Decimal(0) if value is None else Decimal(str(value))
+
+def snapshot(workflow):
+    """The columns the aggregates depend on, from a model instance or a dict."""
+    get = workflow.get if isinstance(workflow, dict) else lambda name: getattr(workflow, name, None)
+    return {name: get(name) for name in DIMENSIONS + FEE_COLUMNS}
+
+def delta(old=None, new=None, deltas=None):
+    """Accumulate the change from `old` to `new` snapshots (None: absent) into `deltas`."""
+    deltas = deltas if deltas is not None else defaultdict(lambda: [0] + [Decimal(0)] * len(FEE_COLUMNS))
+    for values, sign in ((old, -1), (new, 1)):
+        if values is None:
+            continue
+        fees = [_fee(values[name]) * sign for name in FEE_COLUMNS]
+        for key in [TOTAL] + [(name, _key_value(values[name])) for name in DIMENSIONS]:
+            row = deltas[key]
+            row[0] += sign
+            for i, fee in enumerate(fees):
+                row[i + 1] += fee
+    return deltas
+
+def delta_added(rows, deltas=None):
+    """delta() for many new rows (dicts) at once: rows are summed per dimension
+    combination first, so a large batch touches each key once per combination."""
+    groups = defaultdict(lambda: [0] + [Decimal(0)] * len(FEE_COLUMNS))
+    for row in rows:
+        group = groups[tuple(row.get(name) for name in DIMENSIONS)]
+        group[0] += 1
+        for i, name in enumerate(FEE_COLUMNS, start=1):
+            group[i] += _fee(row.get(name))
+    deltas = deltas if deltas is not None else defaultdict(lambda: [0] + [Decimal(0)] * len(FEE_COLUMNS))
+    for values, (count, *fees) in groups.items():
+        for key in [TOTAL] + [(name, _key_value(value)) for name, value in zip(DIMENSIONS, values)]:
+            row = deltas[key]
+            row[0] += count
+            for i, fee in enumerate(fees):
+                row[i + 1] += fee
+    return deltas
+
+def apply(db, deltas):
+    """Add `deltas` to workflow_stats in the caller's transaction.
+
+    Existing rows are bumped with one executemany UPDATE; keys seen for the
+    first time (a new status or category value) are then inserted.
+    """
+    table = models.WorkflowStat.__table__
+    totals = [f"{name}_total" for name in FEE_COLUMNS]
+    rows = [
+        {"b_dimension": dimension, "b_value": value, "b_workflows": count,
+         **{f"b_{total}": fee for total, fee in zip(totals, fees)}}
+        for (dimension, value), (count, *fees) in deltas.items()
+        if count != 0 or any(fees)
+    ]
+    if not rows:
+        return
+    bump = update(table).where(
+        table.c.dimension == bindparam("b_dimension"), table.c.value == bindparam("b_value"),
+    ).values(
+        workflows=table.c.workflows + bindparam("b_workflows"),
+        **{total: table.c[total] + bindparam(f"b_{total}") for total in totals},
+    )
+    result = db.execute(bump, rows)
+    if db.get_bind().dialect.supports_sane_multi_rowcount and result.rowcount == len(rows):
+        return
+    keys = [(row["b_dimension"], row["b_value"]) for row in rows]
+    existing = set(db.execute(select(table.c.dimension, table.c.value).where(
+        tuple_(table.c.dimension, table.c.value).in_(keys))).all())
+    for row in rows:
+        if (row["b_dimension"], row["b_value"]) in existing:
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(insert(table).values(
+                    dimension=row["b_dimension"], value=row["b_value"], workflows=row["b_workflows"],
+                    **{total: row[f"b_{total}"] for total in totals},
+                ))
+        except IntegrityError:
+            # Created concurrently after our UPDATE missed it
+            db.execute(bump, [row])
+
+def read(db):
+    """Counts per dimension value and overall fee totals."""
+    result = {"workflows": 0, "fees": {name: 0.0 for name in FEE_COLUMNS}}
+    result.update({f"by_{name}": {} for name in DIMENSIONS})
+    for row in db.query(models.WorkflowStat).filter(models.WorkflowStat.workflows != 0):
+        if (row.dimension, row.value) == TOTAL:
+            result["workflows"] = row.workflows
+            result["fees"] = {name: float(getattr(row, f"{name}_total") or 0) for name in FEE_COLUMNS}
+        elif row.dimension in DIMENSIONS:
+            result[f"by_{row.dimension}"][row.value] = row.workflows
+    return result
+
+def recompute(db):
+    """Aggregates computed from scratch: {(dimension, value): [count, *fee totals]}."""
+    Workflow = models.Workflow
+    sums = [func.coalesce(func.sum(getattr(Workflow, name)), 0) for name in FEE_COLUMNS]
+    expected = {TOTAL: [db.execute(select(func.count(Workflow.id))).scalar()]
+                + [_fee(v) for v in db.execute(select(*sums)).one()]}
+    for name in DIMENSIONS:
+        column = getattr(Workflow, name)
+        for value, count, *fees in db.execute(select(column, func.count(Workflow.id), *sums).group_by(column)):
+            expected[(name, _key_value(value))] = [count] + [_fee(fee) for fee in fees]
+    return expected
+
+def reconcile(db, repair=False):
+    """Compare workflow_stats with a full recomputation; returns the drifting rows.
+
+    With repair=True the table is replaced by the recomputed values in the
+    caller's transaction (the caller commits).
+    """
+    expected = recompute(db)
+    stored = {
+        (row.dimension, row.value): [row.workflows] + [_fee(getattr(row, f"{name}_total")) for name in FEE_COLUMNS]
+        for row in db.query(models.WorkflowStat)
+    }
+    empty = [0] + [Decimal(0)] * len(FEE_COLUMNS)
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        want, have = expected.get(key, empty), stored.get(key, empty)
+        # Fee columns are NUMERIC(16,4); compare at that precision
+        if want[0] != have[0] or any(round(w - h, 4) for w, h in zip(want[1:], have[1:])):
+            drift.append({
+                "dimension": key[0],
+                "value": key[1],
+                "expected": {"workflows": want[0], **{n: float(f) for n, f in zip(FEE_COLUMNS, want[1:])}},
+                "stored": {"workflows": have[0], **{n: float(f) for n, f in zip(FEE_COLUMNS, have[1:])}},
+            })
+    if repair and drift:
+        db.execute(delete(models.WorkflowStat))
+        db.execute(insert(models.WorkflowStat), [
+            {"dimension": dimension, "value": value, "workflows": count,
+             **{f"{name}_total": fee for name, fee in zip(FEE_COLUMNS, fees)}}
+            for (dimension, value), (count, *fees) in expected.items()
+        ])
+    return drift
@@ -0,0 +1,110 @@
+"""Server-Sent Events feed of committed workflow changes.
+
+Every change published on db.signals becomes one compact event. Each connected
+client gets its own bounded buffer: when a slow client falls behind, its oldest
+events are dropped and it is sent a "resync" event telling it to refetch
+instead. Events only reach clients connected to the worker process that made
+the change.
+"""
+from collections import deque
+from db import signals
+import asyncio
+import itertools
+import json
+import os
+import threading
+
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "100"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+def change_event(change: signals.WorkflowChange):
+    event = {
+        "kind": change.kind,
+        "workflow_id": change.workflow_id,
+        "fields": sorted(change.fields),
+    }
+    if "current_step" in change.fields:
+        event["current_step"] = change.fields["current_step"]
+    if change.step_number is not None:
+        event["step_number"] = change.step_number
+        event["step_status"] = change.step_status
+    return event
+
+class Subscription:
+    def __init__(self, loop, workflow_ids, buffer_size):
+        self.loop = loop
+        self.workflow_ids = workflow_ids  # None: every workflow
+        self.events = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.ready = asyncio.Event()
+
+    def wants(self, workflow_id):
+        return self.workflow_ids is None or workflow_id in self.workflow_ids
+
+    def push(self, event):
+        # Runs on the subscriber's event loop
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append(event)
+        self.ready.set()
+
+    async def next_batch(self, timeout):
+        """Return the buffered (id, event) pairs, or [] after `timeout` seconds without events."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self.ready.clear()
+        batch = list(self.events)
+        self.events.clear()
+        if self.dropped:
+            batch.insert(0, (None, {"kind": "resync", "dropped": self.dropped}))
+            self.dropped = 0
+        return batch
+
+class EventBroker:
+    def __init__(self, buffer_size=EVENTS_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, workflow_ids=None):
+        subscription = Subscription(
+            asyncio.get_running_loop(), set(workflow_ids) if workflow_ids else None, self.buffer_size
+        )
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        # Called from whichever thread committed the change
+        with self._lock:
+            event_id = next(self._ids)
+            targets = [s for s in self._subscriptions if s.wants(event["workflow_id"])]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, (event_id, event))
+            except RuntimeError:
+                # Event loop already closed
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+def format_sse(event_id, event):
+    name = "resync" if event["kind"] == "resync" else "workflow"
+    lines = [f"event: {name}", f"data: {json.dumps(event, default=str, separators=(',', ':'))}"]
+    if event_id is not None:
+        lines.insert(0, f"id: {event_id}")
+    return "\n".join(lines) + "\n\n"
+
+event_broker = EventBroker()
+
+@signals.subscribe
+def broadcast_change(change: signals.WorkflowChange):
+    event_broker.publish(change_event(change))
@@ -0,0 +1,194 @@
+"""Fill the database with synthetic workflows at production-like scale.
+
+Each workflow gets realistic progress: the steps before its current step are
+approved on increasing dates after submission, a few workflows sit on a
+rejected step, and some are finished (all 8 approved, status Done). Workflows
+also get 0-4 edit-history entries in the compact format (db/history.py) and
+0-3 attachment rows; the attachment files themselves are not written.
+
+Rows go in with Core executemany in --batch-size transactions, so memory is
+bounded and millions of workflows are practical. The search index and the
+dashboard aggregates are rebuilt once at the end. --seed makes runs
+reproducible.
+
+    python generate_data.py --workflows 1000000 [--batch-size 5000] [--seed 1]
+"""
+from datetime import date, datetime, timedelta
+from db import database, history, models, search, sequence, stats
+from sqlalchemy import insert
+import argparse
+import hashlib
+import random
+import time
+
+CATEGORIES = ["Utilities", "Telecom", "Government", "Insurance", "Education", "Loans", "Cable TV", "Water"]
+INTEGRATION_TYPES = ["Online Biller", "Offline Biller", "API", "Batch File"]
+OWNERS = [f"owner{i:02d}" for i in range(1, 41)]
+SIGNERS = ["b2b", "integration", "qa", "finance"]
+WORDS = ["power", "metro", "pay", "link", "prime", "global", "city", "net", "first", "union", "smart", "care"]
+FILE_TYPES = [("pdf", "application/pdf"), ("png", "image/png"), ("xlsx", "application/vnd.ms-excel")]
+# Share of workflows whose current step is 1..8 (earlier steps are busier), and of finished ones
+STEP_WEIGHTS = [18, 16, 14, 12, 10, 8, 7, 5]
+DONE_SHARE = 0.10
+REJECTED_SHARE = 0.05
+
+def fee(rng, high):
+    return round(rng.uniform(0, high), 4)
+
+def make_workflow(rng, title, now):
+    submitted = now - timedelta(days=rng.uniform(0, 730))
+    company = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Inc"
+    go_live = (submitted + timedelta(days=rng.randint(30, 180))).date()
+    waive_end = date(go_live.year + 1, go_live.month, min(go_live.day, 28))
+    return {
+        "title": title,
+        "biller_integration_name": f"{company} Billing",
+        "category": rng.choice(CATEGORIES),
+        "integration_type": rng.choice(INTEGRATION_TYPES),
+        "company_name": company,
+        "phone_number": f"+63 2 {rng.randint(1000, 9999)} {rng.randint(1000, 9999)}",
+        "email": f"billing{rng.randint(1, 5000)}@{company.split()[0].lower()}.example.com",
+        "fees_type": rng.choice(["Debit", "Credit"]),
+        "fees_style": rng.choice(["Flat", "Percent"]),
+        "mdr_fee": fee(rng, 3),
+        "fee_waive": rng.random() < 0.2,
+        "fee_waive_end_date": waive_end,
+        "agent_toggle": rng.random() < 0.5,
+        "agent_fee": fee(rng, 15),
+        "system_fee": fee(rng, 5),
+        "transaction_agent_fee": fee(rng, 10),
+        "dtr_fee": fee(rng, 2),
+        "business_owner": rng.choice(OWNERS),
+        "requested_go_live_date": go_live,
+        "setup_fee": fee(rng, 50000),
+        "setup_fee_waive": rng.random() < 0.1,
+        "setup_fee_waive_end_date": waive_end,
+        "maintenance_fee": fee(rng, 5000),
+        "maintenance_fee_waive": rng.random() < 0.1,
+        "maintenance_fee_waive_end_date": waive_end,
+        "portal_fee": fee(rng, 2000),
+        "portal_fee_waive": rng.random() < 0.1,
+        "portal_fee_waive_end_date": waive_end,
+        "requested_by": rng.choice(SIGNERS),
+        "remarks": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30))),
+        "last_updated_by": rng.choice(SIGNERS),
+        "go_live_date": go_live,
+        "submit_date": submitted,
+    }
+
+def make_progress(rng, workflow, now):
+    """Fill in current_step/status/last_updated_date/version; return the 8 step rows (without workflow_id)."""
+    done = rng.random() < DONE_SHARE
+    current = 8 if done else rng.choices(range(1, 9), weights=STEP_WEIGHTS)[0]
+    moment = workflow["submit_date"]
+    steps = []
+    for number in range(1, 9):
+        step = {"step_number": number, "signoff_person": None, "signoff_status": "Pending",
+                "signoff_date": None, "remarks": None}
+        if number < current or done:
+            moment = min(now, moment + timedelta(hours=rng.uniform(2, 120)))
+            step.update(signoff_person=rng.choice(SIGNERS), signoff_status="Approved", signoff_date=moment)
+        elif number == current and rng.random() < REJECTED_SHARE:
+            moment = min(now, moment + timedelta(hours=rng.uniform(2, 120)))
+            step.update(signoff_person=rng.choice(SIGNERS), signoff_status="Rejected", signoff_date=moment,
+                        remarks="Missing documents")
+        steps.append(step)
+    signoffs = sum(1 for step in steps if step["signoff_date"])
+    workflow.update(current_step=current, status="Done" if done else "In Progress",
+                    last_updated_date=moment, version=1 + signoffs)
+    return steps
+
+# Fields edited in the generated history, with how each edit changes the value
+EDITS = {
+    "remarks": lambda rng, old: old + " updated terms",
+    "mdr_fee": lambda rng, old: fee(rng, 3),
+    "setup_fee": lambda rng, old: fee(rng, 50000),
+    "business_owner": lambda rng, old: rng.choice(OWNERS),
+    "go_live_date": lambda rng, old: old + timedelta(days=14),
+}
+
+def make_history(rng, workflow, now):
+    """Edit-history rows (without workflow_id); the edits are applied to `workflow`."""
+    entries = []
+    moment = workflow["submit_date"]
+    for _ in range(rng.choices([0, 1, 2, 3, 4], weights=[40, 25, 15, 12, 8])[0]):
+        moment = min(now, moment + timedelta(hours=rng.uniform(1, 200)))
+        field = rng.choice(list(EDITS))
+        old = workflow[field]
+        new = EDITS[field](rng, old)
+        workflow[field] = new
+        changes = {field: (old, new)}
+        entries.append({"edited_by": rng.choice(SIGNERS), "edited_at": moment,
+                        "changes": history.encode_changes(changes),
+                        "changed_fields": history.changed_fields_key(changes)})
+    return entries
+
+def make_attachments(rng, workflow, now):
+    rows = []
+    for _ in range(rng.choices([0, 1, 2, 3], weights=[50, 30, 15, 5])[0]):
+        extension, file_type = rng.choice(FILE_TYPES)
+        digest = hashlib.sha256(rng.randbytes(16)).hexdigest()
+        rows.append({"file_type": file_type, "file_name": f"{rng.choice(WORDS)}-{rng.randint(1, 999)}.{extension}",
+                     "file_path": f"uploads/{digest}.{extension}", "uploaded_by": rng.choice(SIGNERS),
+                     "uploaded_at": min(now, workflow["submit_date"] + timedelta(days=rng.uniform(0, 30))),
+                     "description": None, "sha256": digest, "size_bytes": rng.randint(10_000, 5_000_000)})
+    return rows
+
+def insert_batch(db, rng, count, now):
+    titles = sequence.allocate_workflow_titles(db, count)
+    workflows = [make_workflow(rng, title, now) for title in titles]
+    children = []
+    for workflow in workflows:
+        steps = make_progress(rng, workflow, now)
+        edits = make_history(rng, workflow, now)
+        attachments = make_attachments(rng, workflow, now)
+        workflow["version"] += len(edits) + len(attachments)
+        children.append((steps, edits, attachments))
+    table = models.Workflow.__table__
+    id_by_title = dict(db.execute(insert(table).returning(table.c.title, table.c.id), workflows).all())
+    step_rows, history_rows, attachment_rows = [], [], []
+    for workflow, (steps, edits, attachments) in zip(workflows, children):
+        workflow_id = id_by_title[workflow["title"]]
+        step_rows += [dict(step, workflow_id=workflow_id) for step in steps]
+        history_rows += [dict(entry, workflow_id=workflow_id) for entry in edits]
+        attachment_rows += [dict(row, workflow_id=workflow_id) for row in attachments]
+    for model, rows in ((models.WorkflowStep, step_rows), (models.EditHistory, history_rows),
+                        (models.Attachment, attachment_rows)):
+        if rows:
+            db.execute(insert(model.__table__), rows)
+    db.commit()
+    return len(step_rows), len(history_rows), len(attachment_rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workflows", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=database.engine)
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    totals = [0, 0, 0]
+    started = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        for done in range(0, args.workflows, args.batch_size):
+            counts = insert_batch(db, rng, min(args.batch_size, args.workflows - done), now)
+            totals = [total + count for total, count in zip(totals, counts)]
+            created = min(done + args.batch_size, args.workflows)
+            rate = created / (time.perf_counter() - started)
+            print(f"{created}/{args.workflows} workflows ({rate:.0f}/s)", flush=True)
+        # Derived data, rebuilt once instead of per batch
+        stats.reconcile(db, repair=True)
+        sequence.bump_change_version(db)
+        db.commit()
+    finally:
+        db.close()
+    if database.engine.dialect.name == "sqlite":
+        search.rebuild(database.engine)
+    print(f"Created {args.workflows} workflows, {totals[0]} steps, {totals[1]} edit-history entries and "
+          f"{totals[2]} attachments in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
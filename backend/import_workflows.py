@@ -0,0 +1,42 @@
+"""Import workflows from a CSV or NDJSON file (the CLI for POST /imports/workflows).
+
+Records are validated and inserted in batches of --batch-size; invalid rows are
+listed with their row number and the rest of the file still loads. Exits with
+status 1 when any row failed.
+
+    python import_workflows.py billers.csv [--format csv|ndjson] [--batch-size 1000]
+"""
+from db import database, models
+from imports import IMPORT_BATCH_ROWS, detect_format, import_file
+import argparse
+import sys
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_ROWS)
+    args = parser.parse_args()
+
+    try:
+        fmt = detect_format(args.path, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+    models.Base.metadata.create_all(bind=database.engine)
+    started = time.perf_counter()
+    with open(args.path, "rb") as binary:
+        result = import_file(binary, fmt, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+    for failure in result.errors:
+        print(f"row {failure.row}: {failure.errors}")
+    if result.errors_truncated:
+        print(f"... {result.failed - len(result.errors)} more failed rows not listed")
+    if result.error:
+        print(result.error)
+    rate = (result.created + result.failed) / elapsed if elapsed else 0
+    print(f"Created {result.created}, failed {result.failed} in {elapsed:.1f}s ({rate:.0f} rows/s)")
+    sys.exit(1 if result.failed or result.error else 0)
+
+if __name__ == "__main__":
+    main()
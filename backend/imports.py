@@ -0,0 +1,119 @@
+"""Streaming bulk import of workflows from CSV or NDJSON.
+
+Used by POST /imports/workflows and import_workflows.py. The file is read one
+record at a time. Every IMPORT_BATCH_ROWS records are validated against
+schemas.WorkflowCreate, and the valid ones are inserted with
+crud.create_workflows_bulk (workflows plus their 8 steps, one transaction per
+batch), so memory stays bounded by the batch size whatever the file size.
+
+A record that fails validation is reported with its row number and does not
+stop the rest of the file. If the file cannot be read to the end (bad
+encoding, broken CSV quoting), the batches committed so far stay and the
+result says where reading stopped.
+"""
+from db import crud, database, schemas
+from pydantic import EmailStr, TypeAdapter, ValidationError, field_validator
+import csv
+import functools
+import io
+import json
+import os
+
+IMPORT_BATCH_ROWS = int(os.getenv("IMPORT_BATCH_ROWS", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+_EMAIL = TypeAdapter(EmailStr)
+
+@functools.lru_cache(maxsize=10000)
+def _normalize_email(value):
+    # email-validator's domain checks dominate per-row validation; sheets repeat addresses a lot
+    return _EMAIL.validate_python(value)
+
+class WorkflowImportRow(schemas.WorkflowCreate):
+    email: str
+
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, value):
+        try:
+            return _normalize_email(value)
+        except ValidationError as e:
+            raise ValueError(e.errors()[0]["msg"])
+
+def detect_format(filename, fmt=None):
+    if fmt:
+        if fmt not in IMPORT_FORMATS.values():
+            raise ValueError(f"Unknown import format: {fmt}")
+        return fmt
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise ValueError("Cannot tell the format from the file name; pass format=csv or format=ndjson")
+    return IMPORT_FORMATS[extension]
+
+def read_csv(text):
+    # Yields (row, data, None); empty cells become None
+    for row, record in enumerate(csv.DictReader(text), start=1):
+        yield row, {key: value or None for key, value in record.items() if key is not None}, None
+
+def read_ndjson(text):
+    # Yields (row, data, None) per non-blank line, or (row, None, errors) for one that is not a JSON object
+    row = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row, None, [{"type": "json_invalid", "loc": [], "msg": f"Invalid JSON: {e}"}]
+            continue
+        if not isinstance(data, dict):
+            yield row, None, [{"type": "model_type", "loc": [], "msg": "Each line must be a JSON object"}]
+            continue
+        yield row, data, None
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+def import_records(db, records, batch_size=IMPORT_BATCH_ROWS, max_errors=IMPORT_MAX_ERRORS):
+    """Validate and insert (row, data, errors) records batch by batch; returns an ImportResult."""
+    result = schemas.ImportResult(created=0, failed=0, errors=[])
+
+    def flush(batch):
+        valid = []
+        for row, data, errors in batch:
+            if errors is None:
+                try:
+                    valid.append(WorkflowImportRow.model_validate(data))
+                    continue
+                except ValidationError as e:
+                    errors = e.errors(include_url=False, include_context=False)
+            result.failed += 1
+            if len(result.errors) < max_errors:
+                result.errors.append(schemas.ImportRowError(row=row, errors=errors))
+            else:
+                result.errors_truncated = True
+        result.created += len(crud.create_workflows_bulk(db, valid))
+
+    batch, row = [], 0
+    try:
+        for record in records:
+            row = record[0]
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        result.error = f"Stopped reading after row {row}: {e}"
+    flush(batch)
+    return result
+
+def import_file(binary, fmt, batch_size=IMPORT_BATCH_ROWS):
+    """Import an open binary file in its own session; returns an ImportResult."""
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    db = database.SessionLocal()
+    try:
+        return import_records(db, READERS[fmt](text), batch_size=batch_size)
+    finally:
+        db.close()
+        text.detach()
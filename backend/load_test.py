@@ -0,0 +1,187 @@
+"""End-to-end load test of the main API endpoints, in-process through the ASGI app.
+
+--concurrency clients each loop over a weighted mix of operations until
+--requests in total have been sent (or for --duration seconds):
+- list: GET /workflows with a random filter
+- detail: GET /workflows/{id}
+- update: GET the detail, then PUT it back with If-Match (412 counts as a conflict)
+- signoff: approve a workflow's current step (409 counts as a conflict)
+- upload: POST a small attachment
+
+Without DATABASE_URL, a fresh SQLite file is filled by generate_data.py with
+--workflows rows first; uploads go to a temporary directory either way.
+Throughput and p50/p95/p99 latency per operation and in total are written to
+--output as JSON. --baseline compares against an earlier output file.
+
+    python load_test.py --workflows 10000 --concurrency 50 --requests 5000 [--output load.json] [--baseline old.json]
+"""
+from bench_async import percentile
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+OPERATIONS = ["list", "detail", "update", "signoff", "upload"]
+DEFAULT_MIX = "list=30,detail=40,update=10,signoff=15,upload=5"
+LIST_FILTERS = [{}, {"status": "In Progress"}, {"status": "Done"}, {"current_step": 1}, {"category": "Utilities"}]
+SIGNERS = ["b2b", "integration", "qa", "finance"]
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+async def op_list(client, rng, workflows):
+    params = dict(rng.choice(LIST_FILTERS), limit=50)
+    return (await client.get("/workflows", params=params)).status_code, False
+
+async def op_detail(client, rng, workflows):
+    return (await client.get(f"/workflows/{rng.randint(1, workflows)}")).status_code, False
+
+async def op_update(client, rng, workflows):
+    from db import schemas
+    workflow_id = rng.randint(1, workflows)
+    response = await client.get(f"/workflows/{workflow_id}")
+    if response.status_code != 200:
+        return response.status_code, False
+    body = {name: value for name, value in response.json().items() if name in schemas.WorkflowUpdate.model_fields}
+    body.update(remarks=f"load test {rng.random():.6f}", last_updated_by=rng.choice(SIGNERS))
+    response = await client.put(f"/workflows/{workflow_id}", json=body, headers={"If-Match": response.headers["etag"]})
+    return response.status_code, response.status_code == 412
+
+async def op_signoff(client, rng, workflows):
+    workflow_id = rng.randint(1, workflows)
+    response = await client.get(f"/workflows/{workflow_id}", params={"fields": "current_step"})
+    if response.status_code != 200:
+        return response.status_code, False
+    step = response.json()["current_step"]
+    response = await client.post(
+        f"/workflows/{workflow_id}/steps/{step}/signoff",
+        json={"signoff_person": rng.choice(SIGNERS), "signoff_status": "Approved", "remarks": None},
+    )
+    return response.status_code, response.status_code == 409
+
+async def op_upload(client, rng, workflows):
+    content = rng.randbytes(rng.randint(1_000, 64_000))
+    response = await client.post(
+        f"/workflows/{rng.randint(1, workflows)}/attachments",
+        files={"file": ("load.pdf", content, "application/pdf")}, data={"description": "load test"},
+    )
+    return response.status_code, False
+
+HANDLERS = {"list": op_list, "detail": op_detail, "update": op_update, "signoff": op_signoff, "upload": op_upload}
+
+def summarize(latencies, errors, conflicts, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "conflicts": conflicts,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+async def run_load(args, workflows):
+    import httpx
+    import main
+
+    names, weights = zip(*args.mix.items())
+    latencies = {name: [] for name in names}
+    errors = dict.fromkeys(names, 0)
+    conflicts = dict.fromkeys(names, 0)
+    remaining = args.requests
+    deadline = time.perf_counter() + args.duration if args.duration else None
+
+    def more():
+        nonlocal remaining
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        remaining -= 1
+        return remaining >= 0
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+        async def user(seed):
+            rng = random.Random(seed)
+            while more():
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                status, conflict = await HANDLERS[name](client, rng, workflows)
+                latencies[name].append(time.perf_counter() - started)
+                conflicts[name] += conflict
+                errors[name] += status >= 400 and not conflict
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(args.seed + i) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    everything = [value for values in latencies.values() for value in values]
+    return {
+        "workflows": workflows,
+        "concurrency": args.concurrency,
+        "mode": "async" if os.getenv("DB_ASYNC") == "1" else "sync",
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize(everything, sum(errors.values()), sum(conflicts.values()), elapsed),
+        "operations": {name: summarize(latencies[name], errors[name], conflicts[name], elapsed) for name in names},
+    }
+
+def compare(result, baseline):
+    # Relative change against an earlier run; throughput up and latency down are improvements
+    rows = [("total", result["total"], baseline.get("total", {}))]
+    rows += [(name, stats, baseline.get("operations", {}).get(name, {})) for name, stats in result["operations"].items()]
+    print(f"{'operation':>10}  {'metric':>14}  {'baseline':>10}  {'now':>10}  {'change':>8}")
+    for name, now, before in rows:
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if before.get(metric):
+                change = (now[metric] - before[metric]) / before[metric] * 100
+                print(f"{name:>10}  {metric:>14}  {before[metric]:>10}  {now[metric]:>10}  {change:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workflows", type=int, default=10000, help="rows to generate into a fresh database")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=5000, help="total requests across all clients")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead of --requests")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"default {DEFAULT_MIX}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix="load_test-")
+    output = os.path.abspath(args.output)
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+        subprocess.run([sys.executable, os.path.join(here, "generate_data.py"), "--workflows", str(args.workflows),
+                        "--seed", str(args.seed)], check=True, cwd=here)
+    # Uploads are written relative to the working directory
+    os.chdir(workdir)
+    from db import database, models
+    from sqlalchemy import func, select
+    with database.SessionLocal() as db:
+        workflows = db.scalar(select(func.max(models.Workflow.id))) or 0
+    if not workflows:
+        parser.error("The database has no workflows")
+
+    result = asyncio.run(run_load(args, workflows))
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result["total"]))
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(result, json.load(f))
+    print(f"Wrote {output}")
+
+if __name__ == "__main__":
+    main()
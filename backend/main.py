@@ -1,13 +1,34 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, Body, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 from starlette.background import BackgroundTasks
+from pydantic import TypeAdapter, ValidationError
+from typing import Any, List, Optional
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import tempfile
 import uvicorn
 import os
-from db import models, database, schemas, crud
+from db import models, database, schemas, crud, crud_async, search
+from cache import LIST_PROJECTION_TAG, response_cache, workflow_tag
+from events import EVENTS_HEARTBEAT_SECONDS, event_broker, format_sse
+from exports import EXPORT_FORMATS, stream_workflows, stream_workflows_async
+from imports import detect_format, import_file
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
+from notifications import sla_scheduler
+from serializers import workflow_detail_json, workflow_list_json
+from urllib.parse import urlencode
 
 app = FastAPI()
+logger = logging.getLogger(__name__)
 
 # CORS (adjust origins as needed)
 app.add_middleware(
@@ -16,13 +37,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Per-route request/SQL metrics for GET /metrics; see metrics.py
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 def startup_db_client():
     from db.database import engine
     from db import models
     models.Base.metadata.create_all(bind=engine)
+    # Creates and fills the full-text index on databases that predate it
+    search.is_available(engine)
+    db = database.SessionLocal()
+    try:
+        crud.seed_stats(db)
+    finally:
+        db.close()
     print("Database initialized on startup")
 
 # Dependency
@@ -33,11 +64,24 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+# Session for the async endpoints, which go through db/crud_async.py: an
+# AsyncSession when DB_ASYNC=1, otherwise a regular Session used from a worker thread
+get_session = get_async_db if database.DB_ASYNC else get_db
+
 # Test endpoint
 @app.get("/test")
 def test_endpoint():
     return {"status": "ok", "message": "API is working"}
 
+# Prometheus text format; one process's counters (see metrics.py)
+@app.get("/metrics")
+def get_metrics():
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # --- Auth (simple, hardcoded) ---
 USERS = {
     "b2b": {"password": "b2bpass", "role": "B2B"},
@@ -56,11 +100,11 @@ def login(username: str = Form(...), password: str = Form(...)):
 # --- Add Test Workflow Helper ---
 @app.post("/add-test-workflow")
 def add_test_workflow(db: Session = Depends(get_db)):
+    # Goes through crud.create_workflow like any other create, so the title sequence,
+    # stats, search index, change version and cache invalidation all see it
     try:
-        # Create a sample workflow
-        from datetime import datetime, date
-        test_workflow = models.Workflow(
-            title="Test Workflow",
+        from datetime import date
+        test_workflow = crud.create_workflow(db, schemas.WorkflowCreate(
             biller_integration_name="Test Biller",
             category="Test Category",
             integration_type="Online Biller",
@@ -92,85 +136,494 @@ def add_test_workflow(db: Session = Depends(get_db)):
             remarks="Test workflow for demo purposes",
             last_updated_by="System",
             go_live_date=date(2025, 6, 15),
-            status="In Progress",
-            current_step=1,
-            submit_date=datetime.now(),
-            last_updated_date=datetime.now()
-        )
-        db.add(test_workflow)
-        db.commit()
-        db.refresh(test_workflow)
-        
-        # Add default steps
-        for step in range(1, 9):
-            db_step = models.WorkflowStep(
-                workflow_id=test_workflow.id,
-                step_number=step,
-                signoff_status='Pending'
-            )
-            db.add(db_step)
-        db.commit()
-        
+        ))
         return {"status": "success", "message": "Test workflow created", "id": test_workflow.id}
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        print(f"Error creating test workflow: {str(e)}")
-        print(error_details)
+        logger.exception("Error creating test workflow")
         return {"status": "error", "message": str(e), "details": error_details}
 
 # --- Workflow CRUD ---
 @app.post("/workflows", response_model=schemas.Workflow)
-def create_workflow(workflow: schemas.WorkflowCreate, db: Session = Depends(get_db)):
-    return crud.create_workflow(db, workflow)
+async def create_workflow(workflow: schemas.WorkflowCreate, db=Depends(get_session)):
+    return await crud_async.create_workflow(db, workflow)
+
+# Largest batch accepted by POST /workflows/bulk
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+
+def validate_bulk(payload):
+    # Items are validated one by one so a bad row is reported instead of failing the batch
+    items, valid = [], []
+    for index, data in enumerate(payload):
+        try:
+            valid.append((index, schemas.WorkflowCreate.model_validate(data)))
+        except ValidationError as e:
+            items.append(schemas.BulkWorkflowItem(index=index, errors=e.errors(include_url=False, include_context=False)))
+    return items, valid
+
+@app.post("/workflows/bulk", response_model=schemas.BulkWorkflowResult)
+async def create_workflows_bulk(payload: List[Any] = Body(...), db=Depends(get_session)):
+    if len(payload) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} workflows per request")
+    # Validation is CPU-bound, keep it off the event loop
+    items, valid = await run_in_threadpool(validate_bulk, payload)
+    created = await crud_async.create_workflows_bulk(db, [workflow for _, workflow in valid])
+    for (index, _), (workflow_id, title) in zip(valid, created):
+        items.append(schemas.BulkWorkflowItem(index=index, id=workflow_id, title=title))
+    items.sort(key=lambda item: item.index)
+    return schemas.BulkWorkflowResult(created=len(created), failed=len(payload) - len(created), items=items)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison (RFC 9110 13.1.2), as required for If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+def _version_etag(version: int) -> str:
+    # Weak: any write anywhere bumps the version, even if this representation is unchanged
+    return f'W/"{version}"'
+
+def _parse_fields(fields: Optional[str], extra=()):
+    # fields= query parameter -> crud.project_fields tuple (None: the endpoint's default set)
+    if fields is None:
+        return None
+    try:
+        return crud.project_fields([name.strip() for name in fields.split(",") if name.strip()], extra=extra)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _workflow_etag(version: int) -> str:
+    # Strong: the workflow's own version moves on every write to it (fields, steps, attachments)
+    return f'"{version}"'
+
+def _if_match_versions(if_match: Optional[str]):
+    # None means no precondition; otherwise the set of versions the client will accept
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        # Strong comparison (RFC 9110 13.1.1): weak tags never match
+        if not (len(tag) > 2 and tag[0] == tag[-1] == '"' and tag[1:-1].isdigit()):
+            raise HTTPException(status_code=412, detail=f"Unrecognised entity tag in If-Match: {tag}")
+        versions.add(int(tag[1:-1]))
+    return versions
 
 @app.get("/workflows", response_model=list[schemas.WorkflowList])
-def list_workflows(db: Session = Depends(get_db)):
+async def list_workflows(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    status: Optional[str] = None,
+    current_step: Optional[int] = None,
+    integration_type: Optional[str] = None,
+    category: Optional[str] = None,
+    business_owner: Optional[str] = None,
+    fields: Optional[str] = None,
+    db=Depends(get_session),
+):
+    # Keyset pagination: the cursor for the next page is returned in X-Next-Cursor
+    # fields: comma-separated workflow columns (and "progress") to select instead of the WorkflowList set
+    projection = _parse_fields(fields, extra=("progress",))
+    params = dict(
+        limit=limit,
+        cursor=cursor,
+        order=order,
+        status=status,
+        current_step=current_step,
+        integration_type=integration_type,
+        category=category,
+        business_owner=business_owner,
+        fields=projection,
+    )
+    cache_tags = ["list"] if projection is None else [LIST_PROJECTION_TAG]
+    # Polling clients send back the ETag; an unchanged version answers 304 from one counter read
+    change_version = await crud_async.get_change_version(db)
+    etag = _version_etag(change_version)
+    # The version is in the key so a page cached before a write (in another worker, or
+    # before this one's invalidation ran) is never served under the newer ETag
+    cache_key = f"list:v{change_version}:" + urlencode(
+        sorted((k, v) for k, v in params.items() if v is not None), doseq=True
+    )
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag})
     try:
-        workflows = crud.list_workflows(db)
-        return workflows
+        page = await response_cache.lookup_async(cache_key)
+        if page is None:
+            versions = await response_cache.versions_async(cache_tags)
+            # Trusted row tuples go straight to JSON; see serializers.py
+            rows, progress, next_cursor = await crud_async.list_workflow_rows(db, **params)
+            body = workflow_list_json(rows, progress, fields=projection).decode()
+            page = {"body": body, "next_cursor": next_cursor}
+            await response_cache.store_async(cache_key, page, cache_tags, versions)
+        headers = {"ETag": etag}
+        if page["next_cursor"]:
+            headers["X-Next-Cursor"] = page["next_cursor"]
+        return Response(content=page["body"], media_type="application/json", headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        import traceback
-        print(f"Error in list_workflows: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in list_workflows")
         raise HTTPException(status_code=500, detail=str(e))
 
+SEARCH_RESULT_ADAPTER = TypeAdapter(List[schemas.WorkflowSearchResult])
+
+# Declared before /workflows/{workflow_id} so "search" is not taken for an id
+@app.get("/workflows/search", response_model=List[schemas.WorkflowSearchResult])
+async def search_workflows(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db=Depends(get_session),
+):
+    # Ranked full-text search; every word matches as a prefix. Next page: X-Next-Cursor
+    try:
+        workflows, next_cursor = await crud_async.search_workflows(db, q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = SEARCH_RESULT_ADAPTER.dump_json(SEARCH_RESULT_ADAPTER.validate_python(workflows, from_attributes=True))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/workflows/{workflow_id}", response_model=schemas.WorkflowDetail)
-def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
-    return crud.get_workflow(db, workflow_id)
+async def get_workflow(
+    workflow_id: int,
+    request: Request,
+    include: Optional[str] = None,
+    fields: Optional[str] = None,
+    db=Depends(get_session),
+):
+    # include: comma-separated subset of attachments,steps,edit_history (default: all)
+    # fields: comma-separated workflow columns to select (default: all)
+    collections = crud.DETAIL_COLLECTIONS if include is None else [c for c in include.split(",") if c]
+    projection = _parse_fields(fields)
+    tags = [workflow_tag(workflow_id)]
+    version = await crud_async.get_workflow_version(db, workflow_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    # Keyed by version too, so a body is never served under another version's ETag
+    # (e.g. a worker that missed the invalidation)
+    cache_key = f"detail:{workflow_id}:v{version}:{','.join(sorted(set(collections)))}"
+    if projection is not None:
+        cache_key += ":" + ",".join(projection)
+    etag = _workflow_etag(version)
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    body = await response_cache.lookup_async(cache_key)
+    if body is None:
+        versions = await response_cache.versions_async(tags)
+        try:
+            row, rows_by_collection = await crud_async.get_workflow_rows(
+                db, workflow_id, include=collections, fields=projection
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if row is None:
+            raise HTTPException(status_code=404, detail="Workflow not found")
+        body = workflow_detail_json(row, rows_by_collection, fields=projection).decode()
+        await response_cache.store_async(cache_key, body, tags, versions)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+HISTORY_LIST_ADAPTER = TypeAdapter(List[schemas.EditHistory])
+
+@app.get("/workflows/{workflow_id}/history", response_model=List[schemas.EditHistory])
+async def get_workflow_history(
+    workflow_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    field: Optional[str] = None,
+    edited_by: Optional[str] = None,
+    db=Depends(get_session),
+):
+    # Newest first; the cursor for older entries is returned in X-Next-Cursor
+    try:
+        entries, next_cursor = await crud_async.list_edit_history(
+            db, workflow_id, limit=limit, cursor=cursor, field=field, edited_by=edited_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = HISTORY_LIST_ADAPTER.dump_json(HISTORY_LIST_ADAPTER.validate_python(entries, from_attributes=True))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# --- Dashboard stats ---
+@app.get("/stats")
+async def get_stats(request: Request, db=Depends(get_session)):
+    # Served from the workflow_stats summary table; no scan of workflows
+    etag = _version_etag(await crud_async.get_change_version(db))
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    body = json.dumps(await crud_async.get_stats(db))
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+@app.post("/stats/reconcile")
+async def reconcile_stats(repair: bool = False, db=Depends(get_session)):
+    # Full recomputation; lists every (dimension, value) whose stored aggregate drifted
+    drift = await crud_async.reconcile_stats(db, repair=repair)
+    return {"drift": drift, "repaired": repair and bool(drift)}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return await response_cache.stats_async()
 
 @app.put("/workflows/{workflow_id}", response_model=schemas.Workflow)
-def update_workflow(workflow_id: int, workflow: schemas.WorkflowUpdate, db: Session = Depends(get_db)):
-    return crud.update_workflow(db, workflow_id, workflow)
+async def update_workflow(
+    workflow_id: int,
+    workflow: schemas.WorkflowUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db=Depends(get_session),
+):
+    # If-Match: "<version>" from the detail ETag; a stale version is rejected with 412
+    try:
+        updated = await crud_async.update_workflow(db, workflow_id, workflow, expected_versions=_if_match_versions(if_match))
+    except crud.VersionMismatch as e:
+        headers = {"ETag": _workflow_etag(e.current_version)} if e.current_version is not None else None
+        raise HTTPException(status_code=412, detail="Workflow was modified by someone else; reload and retry", headers=headers)
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Workflow not found")
+    response.headers["ETag"] = _workflow_etag(updated.version)
+    return updated
+
+# --- Exports ---
+@app.get("/exports/workflows.{fmt}")
+async def export_workflows(
+    fmt: str,
+    status: Optional[str] = None,
+    current_step: Optional[int] = None,
+    integration_type: Optional[str] = None,
+    category: Optional[str] = None,
+    business_owner: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    # Every matching workflow (all columns, or fields=), by id, streamed in EXPORT_BATCH_ROWS batches
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=404, detail=f"Unknown export format: {fmt}")
+    filters = dict(
+        status=status,
+        current_step=current_step,
+        integration_type=integration_type,
+        category=category,
+        business_owner=business_owner,
+    )
+    stream = stream_workflows_async if database.DB_ASYNC else stream_workflows
+    return StreamingResponse(
+        stream(fmt, fields=_parse_fields(fields), **filters),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="workflows.{fmt}"', "X-Accel-Buffering": "no"},
+    )
+
+# --- Imports ---
+@app.post("/imports/workflows", response_model=schemas.ImportResult)
+async def import_workflows(file: UploadFile = File(...), format: Optional[str] = Query(None)):
+    # CSV or NDJSON (format= or the file extension); bad rows are reported, the rest are created
+    try:
+        fmt = detect_format(file.filename, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Parsing, validation and inserts are CPU-bound: one worker thread with its own session
+    return await run_in_threadpool(import_file, file.file, fmt)
 
 # --- File Upload ---
 UPLOAD_DIR = "uploads"
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+# Room for the multipart boundaries, part headers and the description field
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+UPLOAD_PATH = re.compile(r"^/workflows/[^/]+/attachments$")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+class UploadLimitMiddleware:
+    """Refuse oversized attachment uploads before Starlette spools the multipart body.
+
+    A declared Content-Length over the limit is answered with 413 straight away;
+    bodies without one (chunked) are counted as they are received, and once they
+    pass the limit the client gets the 413 and the route sees a disconnect.
+    store_upload still checks the file itself.
+    """
+
+    def __init__(self, app, max_bytes):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not UPLOAD_PATH.match(scope["path"]):
+            return await self.app(scope, receive, send)
+        try:
+            declared = int(dict(scope["headers"]).get(b"content-length", b""))
+        except ValueError:
+            declared = None
+        if declared is not None and declared > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    rejected = True
+                    await self._reject(send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_wrapper(message):
+            # Whatever the route answers to the disconnect, the client already has its 413
+            if not rejected:
+                await send(message)
+
+        await self.app(scope, limited_receive, send_wrapper)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"File exceeds {MAX_UPLOAD_BYTES} bytes"}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                                (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
+
+app.add_middleware(UploadLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD)
+
+def store_upload(source, file_name: str):
+    """Stream an upload into UPLOAD_DIR one chunk at a time; returns (path, sha256, size).
+
+    The data goes to a temp file that is renamed into place only when complete,
+    so memory stays at one chunk and readers never see a partial file. Files are
+    stored under their content hash, so identical uploads share one file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+        sha256 = digest.hexdigest()
+        extension = os.path.splitext(os.path.basename(file_name or ""))[1].lower()
+        if not extension[1:].isalnum():
+            extension = ""
+        file_location = os.path.join(UPLOAD_DIR, sha256 + extension)
+        os.replace(tmp_path, file_location)
+        return file_location, sha256, size
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
 @app.post("/workflows/{workflow_id}/attachments")
-def upload_attachment(workflow_id: int, file: UploadFile = File(...), description: str = Form(None), db: Session = Depends(get_db)):
-    file_location = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_location, "wb") as f:
-        f.write(file.file.read())
-    return crud.add_attachment(db, workflow_id, file.filename, file_location, description)
+async def upload_attachment(workflow_id: int, file: UploadFile = File(...), description: str = Form(None), db=Depends(get_session)):
+    file_location, sha256, size = await run_in_threadpool(store_upload, file.file, file.filename)
+    return await crud_async.add_attachment(db, workflow_id, file.filename, file_location, description,
+                                           sha256=sha256, size_bytes=size)
+
+# Attachments are content-addressed and never modified, so clients may cache them for good
+ATTACHMENT_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 @app.get("/attachments/{attachment_id}")
-def get_attachment(attachment_id: int, db: Session = Depends(get_db)):
-    attachment = crud.get_attachment(db, attachment_id)
-    if not attachment:
+async def get_attachment(attachment_id: int, request: Request, db=Depends(get_session)):
+    attachment = await crud_async.get_attachment(db, attachment_id)
+    if not attachment or not os.path.isfile(attachment.file_path):
         raise HTTPException(status_code=404, detail="Not found")
-    return FileResponse(attachment.file_path, filename=attachment.file_name)
+    if not attachment.sha256:
+        # Uploaded before content hashing; FileResponse still serves Range requests
+        return FileResponse(attachment.file_path, filename=attachment.file_name)
+
+    etag = f'"{attachment.sha256}"'
+    last_modified = attachment.uploaded_at.replace(tzinfo=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": ATTACHMENT_CACHE_CONTROL,
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None:
+        try:
+            not_modified = last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            not_modified = False
+    else:
+        not_modified = False
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    # FileResponse handles Range / If-Range (against our ETag) and answers 206 or 416
+    return FileResponse(attachment.file_path, filename=attachment.file_name, headers=headers)
 
 # --- Signoff ---
-@app.post("/workflows/{workflow_id}/steps/{step_number}/signoff")
-def signoff_step(workflow_id: int, step_number: int, signoff: schemas.StepSignoff, db: Session = Depends(get_db)):
-    return crud.signoff_step(db, workflow_id, step_number, signoff)
+@app.post("/workflows/{workflow_id}/steps/{step_number}/signoff", response_model=schemas.WorkflowStep)
+async def signoff_step(workflow_id: int, step_number: int, signoff: schemas.StepSignoff, db=Depends(get_session)):
+    # 409 when the step no longer has signoff.expected_status (default "Pending")
+    try:
+        step = await crud_async.signoff_step(db, workflow_id, step_number, signoff)
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail="Step not found")
+    except crud.SignoffConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return schemas.WorkflowStep.model_validate(step)
 
-# --- Notification Background Task (stub, to be implemented) ---
+# Largest batch accepted by POST /signoffs/batch
+SIGNOFF_BATCH_MAX_ITEMS = int(os.getenv("SIGNOFF_BATCH_MAX_ITEMS", "1000"))
+
+@app.post("/signoffs/batch", response_model=schemas.BatchSignoffResult)
+async def signoff_steps_batch(items: List[schemas.BatchSignoffItem], db=Depends(get_session)):
+    # All items are applied in one transaction; missing or repeated steps are reported per item
+    if len(items) > SIGNOFF_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {SIGNOFF_BATCH_MAX_ITEMS} signoffs per request")
+    try:
+        outcomes = await crud_async.signoff_steps_batch(db, items)
+    except crud.SignoffConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    applied = sum(1 for outcome in outcomes if outcome["status"] == "applied")
+    return schemas.BatchSignoffResult(applied=applied, failed=len(outcomes) - applied, items=outcomes)
+
+# --- Change feed ---
+@app.get("/events")
+async def stream_events(request: Request, workflow_id: Optional[List[int]] = Query(None)):
+    # Server-Sent Events: one "workflow" event per committed change, optionally
+    # only for the given workflow ids; ": keep-alive" comments hold the connection open
+    subscription = event_broker.subscribe(workflow_id)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(EVENTS_HEARTBEAT_SECONDS)
+                if not batch:
+                    yield ": keep-alive\n\n"
+                for event_id, event in batch:
+                    yield format_sse(event_id, event)
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Notification Background Task ---
 @app.on_event("startup")
-def start_notification_task():
-    # TODO: Start background task for SLA reminders
-    pass
+async def start_notification_task():
+    # SLA reminders (notifications.py): every worker competes for one lease, so only one sends;
+    # SLA_SCHEDULER=0 keeps this worker out entirely
+    if os.getenv("SLA_SCHEDULER", "1") != "0":
+        app.state.sla_task = asyncio.create_task(sla_scheduler.run())
+
+@app.on_event("shutdown")
+async def stop_notification_task():
+    task = getattr(app.state, "sla_task", None)
+    if task:
+        task.cancel()
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
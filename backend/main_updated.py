@@ -1,8 +1,10 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
+from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 from starlette.background import BackgroundTasks
+from typing import List, Optional
 import uvicorn
 import os
 from db import models, database, schemas, crud
@@ -127,7 +129,7 @@ def create_workflow(workflow: schemas.WorkflowCreate, db: Session = Depends(get_
 @app.get("/workflows", response_model=list[schemas.WorkflowList])
 def list_workflows(db: Session = Depends(get_db)):
     try:
-        workflows = crud.list_workflows(db)
+        workflows, _ = crud.list_workflows(db)
         return workflows
     except Exception as e:
         import traceback
@@ -141,30 +143,25 @@ def get_workflow(workflow_id: int, db: Session = Depends(get_db)):
 
 @app.put("/workflows/{workflow_id}", response_model=schemas.Workflow)
 def update_workflow(workflow_id: int, workflow: schemas.WorkflowUpdate, db: Session = Depends(get_db)):
-    return crud.update_workflow(db, workflow_id, workflow)
-
-@app.get("/workflows/{workflow_id}/history")
-def get_workflow_history(workflow_id: int, db: Session = Depends(get_db)):
-    # Fetch all edit history for this workflow
-    history = db.query(models.EditHistory).filter(
-        models.EditHistory.workflow_id == workflow_id
-    ).order_by(models.EditHistory.edited_at.desc()).all()
-    
-    if not history:
-        return []
-    
-    # Format the response
-    result = []
-    for entry in history:
-        result.append({
-            "id": entry.id,
-            "workflow_id": entry.workflow_id,
-            "edited_by": entry.edited_by,
-            "edited_at": entry.edited_at,
-            "changes": entry.changes
-        })
-    
-    return result
+    try:
+        return crud.update_workflow(db, workflow_id, workflow)
+    except crud.VersionMismatch:
+        raise HTTPException(status_code=412, detail="Workflow was modified by someone else; reload and retry")
+
+@app.get("/workflows/{workflow_id}/history", response_model=List[schemas.EditHistory])
+def get_workflow_history(workflow_id: int, response: Response, limit: int = Query(50, ge=1, le=500),
+                         cursor: Optional[str] = None, field: Optional[str] = None,
+                         edited_by: Optional[str] = None, db: Session = Depends(get_db)):
+    # One page of edit history, newest first; the next page's cursor is in X-Next-Cursor
+    try:
+        history, next_cursor = crud.list_edit_history(
+            db, workflow_id, limit=limit, cursor=cursor, field=field, edited_by=edited_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return history
 
 # --- File Upload ---
 UPLOAD_DIR = "uploads"
@@ -187,7 +184,12 @@ def get_attachment(attachment_id: int, db: Session = Depends(get_db)):
 # --- Signoff ---
 @app.post("/workflows/{workflow_id}/steps/{step_number}/signoff")
 def signoff_step(workflow_id: int, step_number: int, signoff: schemas.StepSignoff, db: Session = Depends(get_db)):
-    return crud.signoff_step(db, workflow_id, step_number, signoff)
+    try:
+        return schemas.WorkflowStep.model_validate(crud.signoff_step(db, workflow_id, step_number, signoff))
+    except NoResultFound:
+        raise HTTPException(status_code=404, detail="Step not found")
+    except crud.SignoffConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 # --- Notification Background Task (stub, to be implemented) ---
 @app.on_event("startup")
@@ -0,0 +1,163 @@
+"""Per-route request and SQL metrics, served at GET /metrics in Prometheus text format.
+
+MetricsMiddleware times every request and, through the statement hooks in
+db/database.py (instrument_engine), counts the SQL statements it ran, their
+total time and how long it waited for a pooled connection. Requests are
+labelled by route template (/workflows/{workflow_id}), not by raw path, so
+the number of series stays bounded.
+
+SQL_N_PLUS_ONE_THRESHOLD=N (default 0, off) logs a warning for every request
+that ran the same statement N or more times - usually a lazy load in a loop.
+
+Metrics are per process; with several workers each one reports its own.
+"""
+from collections import Counter, defaultdict
+from db import database
+import logging
+import os
+import threading
+import time
+
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "0"))
+# Upper bounds in seconds (Prometheus client defaults), and finer ones for pool waits
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+logger = logging.getLogger(__name__)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # the last one is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+
+class SqlCollector:
+    """What one request did in the database; filled by the db/database.py hooks."""
+
+    def __init__(self, track_statements=False):
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.checkouts = []
+        self.by_statement = Counter() if track_statements else None
+
+    def statement(self, sql, seconds):
+        self.statements += 1
+        self.sql_seconds += seconds
+        if self.by_statement is not None:
+            self.by_statement[sql] += 1
+
+    def checkout(self, seconds):
+        self.checkouts.append(seconds)
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter()           # (method, route, status) -> count
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # (method, route)
+        self.statements = Counter()         # (method, route) -> statements
+        self.sql_seconds = defaultdict(float)
+        self.repeated = Counter()           # (method, route) -> requests flagged by the N+1 detector
+        self.pool_wait = Histogram(POOL_WAIT_BUCKETS)
+
+    def record(self, method, route, status, seconds, collector):
+        key = (method, route)
+        repeated = {}
+        if collector.by_statement is not None:
+            repeated = {sql: n for sql, n in collector.by_statement.items() if n >= SQL_N_PLUS_ONE_THRESHOLD}
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self.latency[key].observe(seconds)
+            self.statements[key] += collector.statements
+            self.sql_seconds[key] += collector.sql_seconds
+            for wait in collector.checkouts:
+                self.pool_wait.observe(wait)
+            if repeated:
+                self.repeated[key] += 1
+        for sql, n in repeated.items():
+            logger.warning("Possible N+1 in %s %s: statement ran %d times: %s", method, route, n, " ".join(sql.split()))
+
+    def render(self) -> str:
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, histogram, labels=""):
+            cumulative = 0
+            bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{bound}"}} {cumulative}')
+            suffix = f"{{{labels}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {histogram.sum}")
+            lines.append(f"{name}_count{suffix} {cumulative}")
+
+        with self._lock:
+            header("http_requests_total", "counter", "Requests handled, by route and status.")
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{{{_labels(method, route)},status=\"{status}\"}} {count}")
+            header("http_request_duration_seconds", "histogram", "Request latency, by route.")
+            for (method, route), latency in sorted(self.latency.items()):
+                histogram("http_request_duration_seconds", latency, _labels(method, route))
+            header("db_statements_total", "counter", "SQL statements executed while handling requests.")
+            for (method, route), count in sorted(self.statements.items()):
+                lines.append(f"db_statements_total{{{_labels(method, route)}}} {count}")
+            header("db_statement_duration_seconds_total", "counter", "Time spent in SQL statements.")
+            for (method, route), seconds in sorted(self.sql_seconds.items()):
+                lines.append(f"db_statement_duration_seconds_total{{{_labels(method, route)}}} {seconds}")
+            header("db_pool_checkout_wait_seconds", "histogram", "Wait for a pooled database connection.")
+            histogram("db_pool_checkout_wait_seconds", self.pool_wait)
+            if SQL_N_PLUS_ONE_THRESHOLD:
+                header("db_repeated_statement_requests_total", "counter",
+                       f"Requests that ran one statement {SQL_N_PLUS_ONE_THRESHOLD}+ times.")
+                for (method, route), count in sorted(self.repeated.items()):
+                    lines.append(f"db_repeated_statement_requests_total{{{_labels(method, route)}}} {count}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(method, route):
+    return f'method="{method}",route="{_escape(route)}"'
+
+registry = Registry()
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses are timed to their last byte."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        collector = SqlCollector(track_statements=SQL_N_PLUS_ONE_THRESHOLD > 0)
+        token = database.sql_collector.set(collector)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            database.sql_collector.reset(token)
+            route = scope.get("route")
+            # Unmatched paths (404s, scanners) share one series
+            path = getattr(route, "path", None) or "unmatched"
+            registry.record(scope["method"], path, status, time.perf_counter() - started, collector)
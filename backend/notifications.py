@@ -0,0 +1,444 @@
+"""SLA reminders for open workflows.
+
+Upcoming deadlines live in an in-memory min-heap:
+- step_overdue: the current step has been pending for SLA_STEP_HOURS since the
+  last signoff (or since submission)
+- go_live_approaching: requested_go_live_date is SLA_GO_LIVE_WARNING_DAYS away
+  and the workflow is not live yet
+
+The heap is built once, when a worker becomes the scheduler. After that a
+committed change (db.signals) only recomputes the deadlines of the workflows it
+touched, so each tick costs O(due items + changed workflows), never a scan of
+every workflow. Superseded heap entries are skipped lazily using a
+per-workflow generation number.
+
+Every sent reminder is recorded in sla_reminders_sent (one row per workflow and
+kind), so a restart, deploy or lease takeover does not send overdue reminders
+again. Delivery is at least once: a crash between sending and recording repeats
+that one batch.
+
+With several worker processes only one runs the scheduler: each worker's
+scheduler competes for a lease row in scheduler_leases (SLA_LEASE_SECONDS),
+and only the holder loads the heap and sends reminders; another worker takes
+over once the holder stops renewing. Changes committed by other workers do not
+reach the holder's signals, so every due reminder is re-checked against the
+database before it is sent, and every SLA_RELOAD_SECONDS the holder recomputes
+the workflows created, edited or signed off since its last check (indexed on
+last_updated_date, submit_date and signoff_date), not every open workflow.
+
+Stored timestamps are naive UTC (the model defaults and every crud.py write),
+so deadlines are compared with datetime.utcnow().
+
+Due reminders are handed to the notifier in batches. SLA_NOTIFIER selects it:
+"logging" (default, local stand-in) or "package.module:factory".
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time, timedelta
+from sqlalchemy import bindparam, case, func, insert, or_, select, union, update
+from sqlalchemy.exc import IntegrityError
+from db import database, models, signals
+import asyncio
+import heapq
+import importlib
+import itertools
+import logging
+import os
+import socket
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SLA_STEP_HOURS = float(os.getenv("SLA_STEP_HOURS", "48"))
+SLA_GO_LIVE_WARNING_DAYS = float(os.getenv("SLA_GO_LIVE_WARNING_DAYS", "7"))
+SLA_MAX_SLEEP_SECONDS = float(os.getenv("SLA_MAX_SLEEP_SECONDS", "60"))
+SLA_BATCH_SIZE = int(os.getenv("SLA_BATCH_SIZE", "100"))
+SLA_NOTIFIER = os.getenv("SLA_NOTIFIER", "logging")
+SLA_LEASE_SECONDS = float(os.getenv("SLA_LEASE_SECONDS", "60"))
+SLA_RELOAD_SECONDS = float(os.getenv("SLA_RELOAD_SECONDS", "300"))
+# Re-read this much before the last check too, for transactions that committed after it
+RELOAD_OVERLAP = timedelta(seconds=60)
+LEASE_NAME = "sla_scheduler"
+
+CLOSED_STATUSES = {"Done", "Completed", "Rejected", "Cancelled", "Live"}
+LAST_STEP = 8
+REMINDER_KINDS = ("step_overdue", "go_live_approaching")
+
+@dataclass
+class Reminder:
+    kind: str                 # one of REMINDER_KINDS
+    workflow_id: int
+    due_at: datetime
+    details: dict = field(default_factory=dict)
+
+class LoggingNotifier:
+    """Local stand-in: writes each reminder to the log."""
+
+    def send(self, reminders):
+        for reminder in reminders:
+            logger.warning(
+                "SLA reminder %s for workflow %s (due %s): %s",
+                reminder.kind, reminder.workflow_id, reminder.due_at.isoformat(), reminder.details,
+            )
+
+def make_notifier(spec=SLA_NOTIFIER):
+    if spec == "logging":
+        return LoggingNotifier()
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)()
+
+def deadline_rows(db, workflow_ids=None):
+    """Yield (workflow, last_signoff_at) for open workflows, optionally limited to `workflow_ids`."""
+    Workflow, Step = models.Workflow, models.WorkflowStep
+    steps = (
+        select(
+            Step.workflow_id,
+            func.max(Step.signoff_date).label("last_signoff_at"),
+            func.max(case(
+                ((Step.step_number == LAST_STEP) & (Step.signoff_status == "Approved"), 1), else_=0
+            )).label("finished"),
+        )
+        .group_by(Step.workflow_id)
+    )
+    if workflow_ids is not None:
+        steps = steps.where(Step.workflow_id.in_(workflow_ids))
+    steps = steps.subquery()
+    query = (
+        select(
+            Workflow.id, Workflow.current_step, Workflow.submit_date,
+            Workflow.requested_go_live_date, Workflow.go_live_date,
+            steps.c.last_signoff_at,
+        )
+        .outerjoin(steps, steps.c.workflow_id == Workflow.id)
+        .where(Workflow.status.not_in(CLOSED_STATUSES), func.coalesce(steps.c.finished, 0) == 0)
+    )
+    if workflow_ids is not None:
+        query = query.where(Workflow.id.in_(workflow_ids))
+    return db.execute(query.execution_options(yield_per=1000))
+
+def changed_workflow_ids(db, since):
+    """Ids of workflows created, edited or signed off at or after `since`."""
+    Workflow, Step = models.Workflow, models.WorkflowStep
+    return db.execute(union(
+        select(Workflow.id).where(Workflow.last_updated_date >= since),
+        select(Workflow.id).where(Workflow.submit_date >= since),
+        select(Step.workflow_id).where(Step.signoff_date >= since),
+    )).scalars().all()
+
+def sent_reminders(db, workflow_ids=None):
+    """{(workflow id, kind): due_at} of the reminders already sent."""
+    table = models.SentReminder
+    query = select(table.workflow_id, table.kind, table.due_at)
+    if workflow_ids is not None:
+        query = query.where(table.workflow_id.in_(workflow_ids))
+    return {(row.workflow_id, row.kind): row.due_at for row in db.execute(query)}
+
+def record_sent(db, reminders, now):
+    """Remember `reminders` as sent, replacing earlier deadlines of the same kind. Commits."""
+    table = models.SentReminder
+    sent = sent_reminders(db, sorted({reminder.workflow_id for reminder in reminders}))
+    rows = [
+        {"b_workflow_id": r.workflow_id, "b_kind": r.kind, "due_at": r.due_at, "sent_at": now}
+        for r in reminders
+    ]
+    known = [row for row in rows if (row["b_workflow_id"], row["b_kind"]) in sent]
+    if known:
+        db.execute(
+            update(table.__table__)
+            .where(table.workflow_id == bindparam("b_workflow_id"), table.kind == bindparam("b_kind")),
+            known,
+        )
+    new = [
+        {"workflow_id": row["b_workflow_id"], "kind": row["b_kind"], "due_at": row["due_at"], "sent_at": now}
+        for row in rows if (row["b_workflow_id"], row["b_kind"]) not in sent
+    ]
+    if new:
+        db.execute(insert(table), new)
+    db.commit()
+
+def acquire_lease(db, name, owner, seconds, now):
+    """Take or renew the lease `name` for `owner`; True while `owner` holds it. Commits."""
+    table = models.SchedulerLease
+    expires_at = now + timedelta(seconds=seconds)
+    held = db.execute(
+        update(table)
+        .where(table.name == name, or_(table.owner == owner, table.expires_at < now))
+        .values(owner=owner, expires_at=expires_at)
+    ).rowcount == 1
+    if not held and db.get(table, name) is None:
+        try:
+            with db.begin_nested():
+                db.execute(insert(table).values(name=name, owner=owner, expires_at=expires_at))
+            held = True
+        except IntegrityError:
+            pass
+    db.commit()
+    return held
+
+def reminders_for(row):
+    reminders = []
+    pending_since = row.last_signoff_at or row.submit_date
+    if pending_since:
+        reminders.append(Reminder(
+            "step_overdue", row.id, pending_since + timedelta(hours=SLA_STEP_HOURS),
+            {"current_step": row.current_step, "pending_since": pending_since.isoformat()},
+        ))
+    if row.requested_go_live_date and not row.go_live_date:
+        go_live = datetime.combine(row.requested_go_live_date, dt_time.min)
+        reminders.append(Reminder(
+            "go_live_approaching", row.id, go_live - timedelta(days=SLA_GO_LIVE_WARNING_DAYS),
+            {"requested_go_live_date": row.requested_go_live_date.isoformat()},
+        ))
+    return reminders
+
+class SLAScheduler:
+    def __init__(self, notifier=None, session_factory=None, batch_size=SLA_BATCH_SIZE):
+        self.notifier = notifier or LoggingNotifier()
+        self.session_factory = session_factory or database.SessionLocal
+        self.batch_size = batch_size
+        self._heap = []                  # (due_at, seq, generation, reminder)
+        self._generations = {}           # workflow id -> (current generation, unfired entries)
+        self._live = 0                   # heap entries whose generation is current
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._fired = {}                 # (workflow id, kind) -> due_at already notified (sla_reminders_sent)
+        self._dirty = set()
+        self._wakeup = None
+        self._loop = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leader = False
+        self._synced_at = None           # when deadlines were last brought up to date with the database
+        self._renewed_at = None
+
+    # --- Building the heap ---
+    def load_all(self):
+        # On becoming the scheduler only: one pass over the open workflows
+        db = self.session_factory()
+        try:
+            by_workflow = {}
+            for row in deadline_rows(db):
+                by_workflow[row.id] = reminders_for(row)
+            fired = sent_reminders(db)
+        finally:
+            db.close()
+        with self._lock:
+            self._heap, self._generations, self._live, self._fired = [], {}, 0, fired
+            for workflow_id, reminders in by_workflow.items():
+                self._replace(workflow_id, reminders)
+            heapq.heapify(self._heap)
+
+    def refresh(self, workflow_ids):
+        """Recompute the deadlines of `workflow_ids` only."""
+        workflow_ids = list(workflow_ids)
+        db = self.session_factory()
+        try:
+            by_workflow = {workflow_id: [] for workflow_id in workflow_ids}
+            for row in deadline_rows(db, workflow_ids):
+                by_workflow[row.id] = reminders_for(row)
+        finally:
+            db.close()
+        with self._lock:
+            for workflow_id, reminders in by_workflow.items():
+                self._replace(workflow_id, reminders, push=True)
+            self._compact()
+
+    def refresh_changed(self, since):
+        """Recompute the workflows changed at or after `since`, e.g. through another worker."""
+        db = self.session_factory()
+        try:
+            workflow_ids = changed_workflow_ids(db, since)
+        finally:
+            db.close()
+        if workflow_ids:
+            self.refresh(workflow_ids)
+
+    def confirm(self, reminders):
+        """Re-read the workflows of due `reminders` from the database.
+
+        Returns (still due and not yet sent, ids of workflows whose deadlines
+        moved) - e.g. a step signed off through another worker since the heap
+        was built.
+        """
+        workflow_ids = sorted({reminder.workflow_id for reminder in reminders})
+        db = self.session_factory()
+        try:
+            current = {
+                (r.workflow_id, r.kind): r.due_at
+                for row in deadline_rows(db, workflow_ids) for r in reminders_for(row)
+            }
+            sent = sent_reminders(db, workflow_ids)
+        finally:
+            db.close()
+        due = [
+            r for r in reminders
+            if current.get((r.workflow_id, r.kind)) == r.due_at and sent.get((r.workflow_id, r.kind)) != r.due_at
+        ]
+        moved = {r.workflow_id for r in reminders if current.get((r.workflow_id, r.kind)) != r.due_at}
+        return due, moved
+
+    def mark_sent(self, reminders):
+        db = self.session_factory()
+        try:
+            record_sent(db, reminders, datetime.utcnow())
+        finally:
+            db.close()
+
+    def _replace(self, workflow_id, reminders, push=False):
+        # A fresh generation orphans the workflow's previous heap entries
+        previous = self._generations.pop(workflow_id, None)
+        if previous is not None:
+            self._live -= previous[1]
+        # A deadline that already fired stays quiet until the workflow moves it;
+        # fired marks for deadlines that moved (or a workflow that closed) are dropped
+        current = {(workflow_id, r.kind): r.due_at for r in reminders}
+        for kind in REMINDER_KINDS:
+            key = (workflow_id, kind)
+            if key in self._fired and current.get(key) != self._fired[key]:
+                del self._fired[key]
+        reminders = [r for r in reminders if self._fired.get((workflow_id, r.kind)) != r.due_at]
+        if not reminders:
+            return
+        generation = next(self._seq)
+        self._generations[workflow_id] = (generation, len(reminders))
+        self._live += len(reminders)
+        for reminder in reminders:
+            entry = (reminder.due_at, next(self._seq), generation, reminder)
+            if push:
+                heapq.heappush(self._heap, entry)
+            else:
+                self._heap.append(entry)
+
+    def _is_current(self, entry):
+        generation = self._generations.get(entry[3].workflow_id)
+        return generation is not None and generation[0] == entry[2]
+
+    def _compact(self):
+        # Drop orphaned entries once they outnumber the live ones
+        if len(self._heap) > 2 * self._live + 1024:
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+
+    # --- Firing ---
+    def pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                entry = heapq.heappop(self._heap)
+                if not self._is_current(entry):
+                    continue
+                due.append(entry[3])
+                self._fired[(entry[3].workflow_id, entry[3].kind)] = entry[3].due_at
+                generation = self._generations[entry[3].workflow_id]
+                self._generations[entry[3].workflow_id] = (generation[0], generation[1] - 1)
+                self._live -= 1
+        return due
+
+    def next_due_at(self):
+        with self._lock:
+            while self._heap and not self._is_current(self._heap[0]):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def pending(self):
+        return self._live
+
+    # --- Leadership ---
+    def hold_lease(self, now):
+        db = self.session_factory()
+        try:
+            return acquire_lease(db, LEASE_NAME, self.owner, SLA_LEASE_SECONDS, now)
+        finally:
+            db.close()
+
+    def release_lease(self):
+        table = models.SchedulerLease
+        db = self.session_factory()
+        try:
+            db.execute(update(table).where(table.name == LEASE_NAME, table.owner == self.owner)
+                       .values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+            db.commit()
+        finally:
+            db.close()
+
+    def _clear(self):
+        with self._lock:
+            self._heap, self._generations, self._live, self._dirty = [], {}, 0, set()
+
+    # --- Change tracking ---
+    def mark_dirty(self, change: signals.WorkflowChange):
+        # Runs in the committing thread: only record the id and wake the loop
+        with self._lock:
+            self._dirty.add(change.workflow_id)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        # Track changes only while running; subscribed before the initial load so none are missed
+        signals.subscribe(self.mark_dirty)
+        try:
+            await self._run()
+        finally:
+            signals.unsubscribe(self.mark_dirty)
+            self._loop = None
+            if self.leader:
+                # Let another worker take over without waiting for the lease to expire
+                self.leader = False
+                try:
+                    self.release_lease()
+                except Exception:
+                    logger.exception("Releasing the SLA scheduler lease failed")
+            self._clear()
+
+    async def _run(self):
+        while True:
+            try:
+                self._wakeup.clear()
+                now = datetime.utcnow()
+                renew = not self.leader or (now - self._renewed_at).total_seconds() >= SLA_LEASE_SECONDS / 3
+                if renew and not await asyncio.to_thread(self.hold_lease, now):
+                    if self.leader:
+                        logger.warning("SLA scheduler lease lost; another worker sends reminders now")
+                        self.leader = False
+                    self._clear()
+                    await asyncio.sleep(min(SLA_LEASE_SECONDS / 3, SLA_MAX_SLEEP_SECONDS))
+                    continue
+                if renew:
+                    self._renewed_at = now
+                if not self.leader:
+                    self._clear()
+                    await asyncio.to_thread(self.load_all)
+                    self.leader, self._synced_at = True, now
+                elif (now - self._synced_at).total_seconds() >= SLA_RELOAD_SECONDS:
+                    await asyncio.to_thread(self.refresh_changed, self._synced_at - RELOAD_OVERLAP)
+                    self._synced_at = now
+                with self._lock:
+                    dirty, self._dirty = self._dirty, set()
+                if dirty:
+                    await asyncio.to_thread(self.refresh, dirty)
+                batch = self.pop_due(now)
+                while batch:
+                    due, moved = await asyncio.to_thread(self.confirm, batch)
+                    if due:
+                        await asyncio.to_thread(self.notifier.send, due)
+                        await asyncio.to_thread(self.mark_sent, due)
+                    if moved:
+                        await asyncio.to_thread(self.refresh, moved)
+                    batch = self.pop_due(now)
+                next_due = self.next_due_at()
+                # Wake up in time to renew the lease
+                sleep_for = min(SLA_MAX_SLEEP_SECONDS, SLA_LEASE_SECONDS / 3)
+                if next_due is not None:
+                    sleep_for = min(sleep_for, max((next_due - datetime.utcnow()).total_seconds(), 0))
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), sleep_for)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("SLA scheduler tick failed")
+                await asyncio.sleep(SLA_MAX_SLEEP_SECONDS)
+
+sla_scheduler = SLAScheduler(make_notifier())
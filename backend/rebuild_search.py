@@ -0,0 +1,21 @@
+"""Rebuild the workflow full-text search index (db/search.py) from scratch.
+
+Only needed if the index is suspected to be out of date, e.g. after rows were
+edited outside the API; databases without an index get one automatically.
+
+    python rebuild_search.py
+"""
+from db import database, models, search
+import time
+
+def main():
+    models.Base.metadata.create_all(bind=database.engine)
+    if database.engine.dialect.name != "sqlite":
+        print("Full-text index is SQLite-only; search uses LIKE on this database")
+        return
+    started = time.perf_counter()
+    count = search.rebuild(database.engine)
+    print(f"Indexed {count} workflows in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
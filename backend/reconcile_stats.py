@@ -0,0 +1,32 @@
+"""Recompute the dashboard aggregates (db/stats.py) and report drift.
+
+Exits with status 1 when drift is found, so it can run from cron or CI.
+--repair replaces the stored aggregates with the recomputed ones.
+
+    python reconcile_stats.py [--repair]
+"""
+from db import crud, database, models
+import argparse
+import sys
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repair", action="store_true", help="overwrite drifting aggregates")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        drift = crud.reconcile_stats(db, repair=args.repair)
+    finally:
+        db.close()
+    for row in drift:
+        print(f"{row['dimension']}={row['value']!r}: stored {row['stored']} expected {row['expected']}")
+    if not drift:
+        print("No drift")
+    elif args.repair:
+        print(f"Repaired {len(drift)} aggregates")
+    sys.exit(1 if drift and not args.repair else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Fast JSON bodies for GET /workflows and GET /workflows/{id}.
+
+Both endpoints read rows from trusted queries (crud.list_workflow_rows and
+crud.get_workflow_rows) whose columns are exactly the response schema's
+fields, in order. Validating them through Pydantic only to dump them again
+re-checks what the database already typed, and costs more than the query.
+
+A RowSerializer is built once per schema at import: it zips a row tuple with
+the field names and applies only the conversions the schema would have made
+(Decimal fees to float, legacy edit-history changes to {old_value, new_value}).
+dumps() encodes with orjson when installed and falls back to the json module,
+producing the same JSON as model_dump_json.
+
+    python bench_serialize.py --rows 10000
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+import functools
+from db import crud, schemas
+from db.history import decode_changes
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: the json module produces the same output, slower
+    orjson = None
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+if orjson is not None:
+    def dumps(value) -> bytes:
+        return orjson.dumps(value, default=_default)
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(value) -> bytes:
+        return _encoder.encode(value).encode()
+
+def _is_float(annotation) -> bool:
+    return annotation is float or annotation == Optional[float]
+
+def _float(value):
+    return None if value is None else float(value)
+
+class RowSerializer:
+    """Maps row tuples holding `fields` of `model` (default: all, in order) to dicts."""
+
+    def __init__(self, model, fields=None, converters=None):
+        self.fields = tuple(fields or model.model_fields)
+        unknown = set(self.fields) - set(model.model_fields)
+        if unknown:
+            raise ValueError(f"{model.__name__} has no fields {sorted(unknown)}")
+        converters = dict(converters or {})
+        for name in self.fields:
+            if name not in converters and _is_float(model.model_fields[name].annotation):
+                converters[name] = _float
+        self.converters = tuple(converters.items())
+
+    def to_dict(self, row) -> dict:
+        item = dict(zip(self.fields, row))
+        for name, convert in self.converters:
+            item[name] = convert(item[name])
+        return item
+
+WORKFLOW_LIST = RowSerializer(schemas.WorkflowList, fields=[column.key for column in crud.LIST_COLUMNS])
+WORKFLOW = RowSerializer(schemas.Workflow, fields=[column.key for column in crud.DETAIL_COLUMNS])
+DETAIL_COLLECTIONS = {
+    "attachments": RowSerializer(schemas.Attachment),
+    "steps": RowSerializer(schemas.WorkflowStep),
+    "edit_history": RowSerializer(schemas.EditHistory, converters={"changes": decode_changes}),
+}
+
+@functools.lru_cache(maxsize=256)
+def workflow_fields(fields) -> RowSerializer:
+    # fields=: a crud.project_fields tuple of schemas.Workflow columns
+    return RowSerializer(schemas.Workflow, fields=fields)
+
+def workflow_list_json(rows, progress, fields=None) -> bytes:
+    # progress: {workflow_id: dict with schemas.StepProgress's fields}, as built by crud.step_progress
+    if fields is None:
+        to_dict, with_progress = WORKFLOW_LIST.to_dict, True
+    else:
+        to_dict = workflow_fields(tuple(name for name in fields if name != "progress")).to_dict
+        with_progress = "progress" in fields
+    items = []
+    for row in rows:
+        item = to_dict(row)
+        if with_progress:
+            item["progress"] = progress.get(item["id"])
+        items.append(item)
+    return dumps(items)
+
+def workflow_detail_json(row, collections, fields=None) -> bytes:
+    # collections: only those that were loaded (include=); the others are left out
+    # of the body, so "not requested" never reads as "empty"
+    body = (WORKFLOW if fields is None else workflow_fields(fields)).to_dict(row)
+    for name, serializer in DETAIL_COLLECTIONS.items():
+        if name in collections:
+            body[name] = [serializer.to_dict(item) for item in collections[name]]
+    return dumps(body)
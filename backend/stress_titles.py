@@ -0,0 +1,108 @@
+"""Create thousands of workflows in parallel and check every WFxxxxx title is unique.
+
+Spawns several worker processes, each running several threads that call
+crud.create_workflow against one shared SQLite file, the way multiple uvicorn
+workers would. Exits non-zero on any collision or failed create.
+
+    python stress_titles.py --processes 4 --threads 4 --per-thread 250
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+def sample_workflow(n):
+    from db import schemas
+    return schemas.WorkflowCreate(
+        biller_integration_name=f"Stress Biller {n}",
+        category="Stress",
+        integration_type="Online Biller",
+        company_name="Stress Co",
+        phone_number="000",
+        email="stress@example.com",
+        fees_type="Debit",
+        fees_style="Flat",
+        mdr_fee=1.0,
+        fee_waive=False,
+        fee_waive_end_date=date(2030, 1, 1),
+        agent_toggle=False,
+        agent_fee=0.0,
+        system_fee=0.0,
+        transaction_agent_fee=0.0,
+        dtr_fee=0.0,
+        business_owner="Stress",
+        requested_go_live_date=date(2030, 1, 1),
+        setup_fee=0.0,
+        setup_fee_waive=False,
+        setup_fee_waive_end_date=date(2030, 1, 1),
+        maintenance_fee=0.0,
+        maintenance_fee_waive=False,
+        maintenance_fee_waive_end_date=date(2030, 1, 1),
+        portal_fee=0.0,
+        portal_fee_waive=False,
+        portal_fee_waive_end_date=date(2030, 1, 1),
+        requested_by="stress",
+        remarks="",
+        last_updated_by="stress",
+        go_live_date=date(2030, 1, 1),
+    )
+
+def worker(args):
+    threads, per_thread = args
+    from db import crud, database
+
+    def run(thread_index):
+        errors = []
+        for n in range(per_thread):
+            db = database.SessionLocal()
+            try:
+                crud.create_workflow(db, sample_workflow(n))
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                db.close()
+        return errors
+
+    with ThreadPoolExecutor(threads) as pool:
+        return [e for errors in pool.map(run, range(threads)) for e in errors]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--per-thread", type=int, default=250)
+    parser.add_argument("--block-size", type=int, default=50, help="WORKFLOW_TITLE_BLOCK_SIZE for the workers")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["WORKFLOW_TITLE_BLOCK_SIZE"] = str(args.block_size)
+
+    from db import database, models
+    from sqlalchemy import func
+    models.Base.metadata.create_all(bind=database.engine)
+
+    total = args.processes * args.threads * args.per_thread
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+        errors = [e for errors in pool.map(worker, [(args.threads, args.per_thread)] * args.processes) for e in errors]
+    elapsed = time.perf_counter() - started
+
+    db = database.SessionLocal()
+    rows = db.query(func.count(models.Workflow.id)).scalar()
+    titles = db.query(func.count(func.distinct(models.Workflow.title))).scalar()
+    db.close()
+
+    print(f"requested={total} created={rows} distinct_titles={titles} errors={len(errors)} "
+          f"elapsed={elapsed:.2f}s ({rows / elapsed:.0f} creates/s)")
+    for error in errors[:5]:
+        print("  ", error)
+    if errors or rows != total or titles != rows:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from datetime import date
+import os
+import sys
+import tempfile
+
+# db.database builds its engine at import, so point it at a scratch file first
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from db import crud, database, models, schemas
+import pytest
+
+WORKFLOW = dict(
+    biller_integration_name="Test Biller", category="Utilities", integration_type="Online Biller",
+    company_name="Test Co", phone_number="000", email="test@example.com", fees_type="Debit",
+    fees_style="Flat", mdr_fee=1.0, fee_waive=False, fee_waive_end_date=date(2030, 1, 1),
+    agent_toggle=False, agent_fee=0.0, system_fee=0.0, transaction_agent_fee=0.0, dtr_fee=0.0,
+    business_owner="owner", requested_go_live_date=date(2030, 1, 1), setup_fee=0.0,
+    setup_fee_waive=False, setup_fee_waive_end_date=date(2030, 1, 1), maintenance_fee=0.0,
+    maintenance_fee_waive=False, maintenance_fee_waive_end_date=date(2030, 1, 1), portal_fee=0.0,
+    portal_fee_waive=False, portal_fee_waive_end_date=date(2030, 1, 1), requested_by="test",
+    remarks="", last_updated_by="test", go_live_date=date(2030, 1, 1),
+)
+
+@pytest.fixture(scope="session", autouse=True)
+def tables():
+    models.Base.metadata.create_all(bind=database.engine)
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def workflow(db):
+    """A workflow with its 8 steps, one edit-history entry and one attachment."""
+    created = crud.create_workflow(db, schemas.WorkflowCreate(**WORKFLOW))
+    edit = dict(WORKFLOW, remarks="edited", current_step=1, status="In Progress", last_updated_date=None)
+    crud.update_workflow(db, created.id, schemas.WorkflowUpdate(**edit))
+    crud.add_attachment(db, created.id, "a.pdf", "uploads/a.pdf")
+    db.expire_all()
+    return created.id
+
+@contextmanager
+def count_statements(engine=None):
+    """Collects the SQL of every statement `engine` runs inside the block."""
+    engine = engine or database.engine
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
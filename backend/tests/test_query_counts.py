@@ -0,0 +1,37 @@
+from conftest import count_statements
+from db import crud
+import pytest
+
+INCLUDES = [(), ("steps",), ("attachments", "edit_history"), crud.DETAIL_COLLECTIONS]
+
+@pytest.mark.parametrize("include", INCLUDES)
+def test_get_workflow_rows_runs_one_query_per_collection(db, workflow, include):
+    with count_statements() as statements:
+        row, collections = crud.get_workflow_rows(db, workflow, include=include)
+    assert row is not None
+    assert set(collections) == set(include)
+    assert len(statements) == 1 + len(include), statements
+
+@pytest.mark.parametrize("include", INCLUDES)
+@pytest.mark.filterwarnings("error::sqlalchemy.exc.SADeprecationWarning")
+def test_get_workflow_runs_one_query_per_collection(db, workflow, include):
+    with count_statements() as statements:
+        loaded = crud.get_workflow(db, workflow, include=include)
+        # Touching every collection must not lazy-load anything
+        for name in crud.DETAIL_COLLECTIONS:
+            list(getattr(loaded, name))
+    assert len(statements) == 1 + len(include), statements
+    assert len(loaded.steps) == (8 if "steps" in include else 0)
+
+def test_get_workflow_rows_missing_workflow_is_one_query(db):
+    with count_statements() as statements:
+        assert crud.get_workflow_rows(db, 10**9) == (None, {})
+    assert len(statements) == 1
+
+def test_list_workflow_rows_is_two_queries_whatever_the_page_size(db, workflow):
+    for limit in (1, 50):
+        with count_statements() as statements:
+            rows, progress, _ = crud.list_workflow_rows(db, limit=limit)
+        assert rows and rows[0].id in progress
+        # The page, then step progress for every workflow on it in one query
+        assert len(statements) == 2, statements
@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import './App.css';
-import { fetchWorkflows } from './api';
+import { fetchWorkflows, searchWorkflows } from './api';
 
 interface Workflow {
   id: number;
@@ -11,6 +11,13 @@ interface Workflow {
   current_step: number;
   status: string;
   submit_date: string;
+  progress?: {
+    approved: number;
+    rejected: number;
+    pending: number;
+    last_signoff_by?: string;
+    last_signoff_at?: string;
+  };
 }
 
 const STEP_LABELS = [
@@ -29,12 +36,22 @@ function App() {
   const [workflows, setWorkflows] = useState<Workflow[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [query, setQuery] = useState('');
 
-  useEffect(() => {
-    fetchWorkflows()
-      .then(setWorkflows)
+  const loadPage = (cursor?: string | null) => {
+    setLoading(true);
+    (query.trim() ? searchWorkflows(query.trim(), cursor) : fetchWorkflows(cursor))
+      .then((page) => {
+        setWorkflows((prev) => (cursor ? [...prev, ...page.workflows] : page.workflows));
+        setNextCursor(page.nextCursor);
+      })
       .catch((e) => setError(e.message))
       .finally(() => setLoading(false));
+  };
+
+  useEffect(() => {
+    loadPage();
   }, []);
 
   return (
@@ -42,7 +59,16 @@ function App() {
       <h1 className="text-3xl font-bold mb-6 text-center">Biller/Merchant Onboarding Workflows</h1>
       {loading && <div className="text-center">Loading...</div>}
       {error && <div className="text-center text-red-600">{error}</div>}
-      <div className="max-w-5xl mx-auto mb-4 flex justify-end">
+      <div className="max-w-5xl mx-auto mb-4 flex justify-between">
+        <form onSubmit={(e) => { e.preventDefault(); loadPage(); }}>
+          <input
+            type="search"
+            value={query}
+            onChange={(e) => setQuery(e.target.value)}
+            placeholder="Search billers, companies, remarks..."
+            className="border rounded px-3 py-1 w-72"
+          />
+        </form>
         <Link to="/create" className="btn-primary">+ New Workflow</Link>
       </div>
       <div className="max-w-5xl mx-auto">
@@ -53,6 +79,7 @@ function App() {
               <th className="py-2 px-4 text-left">Biller/Merchant</th>
               <th className="py-2 px-4 text-left">Company</th>
               <th className="py-2 px-4 text-left">Current Step</th>
+              <th className="py-2 px-4 text-left">Progress</th>
               <th className="py-2 px-4 text-left">Status</th>
               <th className="py-2 px-4 text-left">Started</th>
               <th className="py-2 px-4">Details</th>
@@ -69,6 +96,13 @@ function App() {
                     {STEP_LABELS[wf.current_step] || `Step ${wf.current_step}`}
                   </span>
                 </td>
+                <td className="py-2 px-4 text-xs">
+                  {wf.progress && (
+                    <span title={wf.progress.last_signoff_at ? `Last signoff by ${wf.progress.last_signoff_by} on ${new Date(wf.progress.last_signoff_at).toLocaleString()}` : 'No signoffs yet'}>
+                      {wf.progress.approved} approved · {wf.progress.rejected} rejected · {wf.progress.pending} pending
+                    </span>
+                  )}
+                </td>
                 <td className="py-2 px-4">
                   <span className={`inline-block px-2 py-1 rounded text-xs ${wf.status === 'Done' ? 'bg-green-100 text-green-800' : 'bg-yellow-100 text-yellow-800'}`}>{wf.status}</span>
                 </td>
@@ -80,11 +114,18 @@ function App() {
             ))}
             {workflows.length === 0 && !loading && (
               <tr>
-                <td colSpan={7} className="text-center py-8 text-slate-500">No workflows found.</td>
+                <td colSpan={8} className="text-center py-8 text-slate-500">No workflows found.</td>
               </tr>
             )}
           </tbody>
         </table>
+        {nextCursor && (
+          <div className="mt-4 text-center">
+            <button className="btn-primary" disabled={loading} onClick={() => loadPage(nextCursor)}>
+              Load more
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
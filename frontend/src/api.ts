@@ -1,13 +1,34 @@
 // API utility for backend requests
 export const API_BASE = process.env.REACT_APP_API_BASE || 'http://localhost:8000';
 
-export async function fetchWorkflows() {
+// Last response per list URL, revalidated with If-None-Match: the server answers
+// 304 without re-reading workflows when nothing has changed since that ETag
+const listCache = new Map<string, { etag: string; workflows: any[]; nextCursor: string | null }>();
+
+// The list is keyset-paginated; pass the previous page's nextCursor to continue
+export async function fetchWorkflows(cursor?: string | null) {
   try {
-    const res = await fetch(`${API_BASE}/workflows`);
+    const params = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const url = `${API_BASE}/workflows${params}`;
+    const cached = listCache.get(url);
+    const res = await fetch(url, { headers: cached ? { 'If-None-Match': cached.etag } : {} });
+    if (res.status === 304 && cached) return { workflows: cached.workflows, nextCursor: cached.nextCursor };
     if (!res.ok) throw new Error(`Failed to fetch workflows: ${res.status} ${res.statusText}`);
-    return res.json();
+    const page = { workflows: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+    const etag = res.headers.get('ETag');
+    if (etag) listCache.set(url, { etag, ...page });
+    return page;
   } catch (error) {
     console.error('Error fetching workflows:', error);
     throw error;
   }
 }
+
+// Ranked full-text search (title, biller, company, owner, remarks); words match as prefixes
+export async function searchWorkflows(q: string, cursor?: string | null) {
+  const params = new URLSearchParams({ q });
+  if (cursor) params.set('cursor', cursor);
+  const res = await fetch(`${API_BASE}/workflows/search?${params}`);
+  if (!res.ok) throw new Error(`Search failed: ${res.status} ${res.statusText}`);
+  return { workflows: await res.json(), nextCursor: res.headers.get('X-Next-Cursor') };
+}
@@ -75,6 +75,8 @@ export default function WorkflowStepSignoff({
       
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({}));
+        // 409: someone else signed this step off first; reload to show their decision
+        if (response.status === 409) onSignoffComplete();
         throw new Error(errorData.detail || 'Failed to sign off on this step');
       }
       
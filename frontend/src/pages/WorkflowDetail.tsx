@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { API_BASE } from '../api';
 import WorkflowStepSignoff from '../components/WorkflowStepSignoff';
@@ -99,15 +99,24 @@ export default function WorkflowDetail() {
   const [updateSuccess, setUpdateSuccess] = useState(false);
   const [editHistory, setEditHistory] = useState<any[]>([]);
   const [historyLoading, setHistoryLoading] = useState(false);
+  const [historyCursor, setHistoryCursor] = useState<string | null>(null);
+  // ETag (the workflow's version) of the loaded data; sent as If-Match when saving edits
+  const [etag, setEtag] = useState<string | null>(null);
+  // Set when the change feed reports a change while the edit form is open; the form is not reloaded under the user
+  const [stale, setStale] = useState(false);
+  const isEditingRef = useRef(false);
   const { user } = useAuth();
 
   // Function to fetch workflow data
   const fetchWorkflow = async () => {
     try {
       setLoading(true);
-      const res = await fetch(`${API_BASE}/workflows/${id}`);
+      // Edit history is paged separately by fetchWorkflowHistory
+      const res = await fetch(`${API_BASE}/workflows/${id}?include=attachments,steps`);
       if (!res.ok) throw new Error('Failed to fetch workflow');
       const data = await res.json();
+      setEtag(res.headers.get('ETag'));
+      setStale(false);
       setWorkflow(data);
       setEditFormData(data); // Initialize edit form with current data
       
@@ -120,16 +129,18 @@ export default function WorkflowDetail() {
     }
   };
   
-  // Function to fetch workflow edit history
-  const fetchWorkflowHistory = async () => {
+  // Function to fetch workflow edit history (newest page first; older pages are appended via X-Next-Cursor)
+  const fetchWorkflowHistory = async (cursor?: string) => {
     if (!id) return;
     
     try {
       setHistoryLoading(true);
-      const res = await fetch(`${API_BASE}/workflows/${id}/history`);
+      const url = `${API_BASE}/workflows/${id}/history` + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : '');
+      const res = await fetch(url);
       if (!res.ok) throw new Error('Failed to fetch workflow history');
       const data = await res.json();
-      setEditHistory(data);
+      setEditHistory(prev => (cursor ? [...prev, ...data] : data));
+      setHistoryCursor(res.headers.get('X-Next-Cursor'));
     } catch (e) {
       console.error('Error fetching workflow history:', e);
       // We don't need to show this error to the user, it's not critical
@@ -196,11 +207,17 @@ export default function WorkflowDetail() {
       const res = await fetch(`${API_BASE}/workflows/${id}`, {
         method: 'PUT',
         headers: {
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          ...(etag ? { 'If-Match': etag } : {})
         },
         body: JSON.stringify(updatedData)
       });
       
+      if (res.status === 412) {
+        // Someone else saved first: show their version instead of overwriting it
+        await fetchWorkflow();
+        throw new Error('This workflow was changed by someone else. The latest version has been loaded; please re-apply your edits.');
+      }
       if (!res.ok) throw new Error('Failed to update workflow');
       
       // Refresh workflow data and history
@@ -217,11 +234,34 @@ export default function WorkflowDetail() {
     }
   };
 
+  // Leave the edit form; pick up changes that arrived while it was open
+  const handleCancelEdit = () => {
+    setIsEditing(false);
+    setEditFormData(workflow || {});
+    if (stale) fetchWorkflow();
+  };
+
   // Load workflow data on component mount and after sign-offs
   useEffect(() => {
     fetchWorkflow();
   }, [id]);
 
+  useEffect(() => {
+    isEditingRef.current = isEditing;
+  }, [isEditing]);
+
+  // Refetch when someone else changes this workflow (server-sent change feed).
+  // While editing, only mark the page stale: refetching would discard the user's
+  // edits and replace the ETag their save is checked against.
+  useEffect(() => {
+    if (!id) return;
+    const onChange = () => (isEditingRef.current ? setStale(true) : fetchWorkflow());
+    const events = new EventSource(`${API_BASE}/events?workflow_id=${id}`);
+    events.addEventListener('workflow', onChange);
+    events.addEventListener('resync', onChange);
+    return () => events.close();
+  }, [id]);
+
   if (loading) return <div className="text-center py-12">Loading...</div>;
   if (error) return <div className="text-center text-red-600 py-12">{error}</div>;
   if (!workflow) return <div className="text-center py-12">Workflow not found.</div>;
@@ -278,7 +318,7 @@ export default function WorkflowDetail() {
             <h2 className="text-2xl font-bold">Edit Workflow Details</h2>
             <div className="flex space-x-2">
               <button 
-                onClick={() => setIsEditing(false)}
+                onClick={handleCancelEdit}
                 className="px-3 py-1.5 bg-gray-500 hover:bg-gray-600 text-white rounded-md text-sm transition-colors"
                 disabled={updateLoading}>
                 Cancel
@@ -292,6 +332,12 @@ export default function WorkflowDetail() {
             </div>
           </div>
           
+          {stale && (
+            <div className="mb-4 bg-yellow-100 border border-yellow-400 text-yellow-800 px-4 py-3 rounded" role="alert">
+              This workflow was changed by someone else while you were editing. Saving will be rejected; cancel to load the latest version.
+            </div>
+          )}
+          
           <form onSubmit={handleUpdateWorkflow} className="space-y-6">
             <div className="grid grid-cols-1 gap-6">
               {/* Basic Information */}
@@ -987,13 +1033,21 @@ export default function WorkflowDetail() {
                       {Object.entries(entry.changes).map(([field, change]: [string, any]) => (
                         <div key={field} className="grid grid-cols-3 gap-2 text-sm">
                           <div className="font-medium">{field.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase())}</div>
-                          <div className="text-red-500 line-through">{change.old_value || '-'}</div>
-                          <div className="text-green-600">{change.new_value || '-'}</div>
+                          <div className="text-red-500 line-through">{change.old_value != null ? String(change.old_value) : '-'}</div>
+                          <div className="text-green-600">{change.new_value != null ? String(change.new_value) : '-'}</div>
                         </div>
                       ))}
                     </div>
                   </div>
                 ))}
+                {historyCursor && (
+                  <button
+                    className="text-blue-600 hover:underline text-sm"
+                    onClick={() => fetchWorkflowHistory(historyCursor)}
+                  >
+                    Load older changes
+                  </button>
+                )}
               </div>
             )}
           </div>